@@ -1,60 +1,103 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from typing import Dict, Optional
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
 import time
+import json
+import os
+import re
 from datetime import datetime
 import logging
 
 from ..models.dialogue import DialogueRequest, DialogueResponse, ErrorResponse
 from ..core.session_manager import get_session_manager
-from ..core.stt import get_stt_service
+from ..core.stt import get_stt_service, STTOverloadedError
 from ..core.rag import get_rag_service
 from ..core.llm import get_llm_service
+from ..core.llm_scheduler import LLMOverloadedError
 from ..core.tts import get_tts_service
 from ..core.rag_learner import get_rag_learner
+from ..core.response_cache import get_response_cache
+from ..core.single_flight import get_single_flight_stats
+from ..utils.audio_processing import pcm16_to_float32, raw_pcm_sample_rate, resample
+from ..utils.uploads import AudioSpool, UploadTooLargeError
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+DEFAULT_LATENCY_BUDGET_MS = int(os.getenv("DIALOGUE_LATENCY_BUDGET_MS", "15000"))
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_KB", "10240")) * 1024
+MAX_REQUEST_BYTES = MAX_UPLOAD_BYTES + 64 * 1024
+UPLOAD_MEMORY_BYTES = int(os.getenv("UPLOAD_MEMORY_KB", "512")) * 1024
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+MAX_AUDIO_SECONDS = float(os.getenv("MAX_AUDIO_SECONDS", "60"))
+
 CHARACTERS = {
     "roman_gladiator": {
         "name": "Marcus Quintus",
         "title": "Gladiator of the Colosseum",
         "greeting": "Salve, citizen! I am Marcus, a gladiator who has fought in the great arena.",
-        "personality": "Brave, disciplined, speaks with authority about combat and honor"
+        "personality": "Brave, disciplined, speaks with authority about combat and honor",
+        "vocabulary": ["Colosseum", "gladius", "lanista", "Caesar", "murmillo", "retiarius", "ludus", "denarii"]
     },
     "mughal_architect": {
         "name": "Ustad Ahmad Lahauri",
         "title": "Master Architect",
         "greeting": "Peace be upon you. I am Ahmad, architect of magnificent monuments.",
-        "personality": "Wise, artistic, speaks about beauty, mathematics, and divine inspiration"
+        "personality": "Wise, artistic, speaks about beauty, mathematics, and divine inspiration",
+        "vocabulary": ["Taj Mahal", "Shah Jahan", "Mumtaz Mahal", "Agra", "pietra dura", "chhatri", "iwan", "Lahore"]
     },
     "egyptian_scribe": {
         "name": "Khaemwaset",
         "title": "Royal Scribe",
         "greeting": "Greetings, traveler. I serve in the house of Pharaoh as keeper of sacred knowledge.",
-        "personality": "Learned, formal, speaks about hieroglyphs, gods, and ancient wisdom"
+        "personality": "Learned, formal, speaks about hieroglyphs, gods, and ancient wisdom",
+        "vocabulary": ["Pharaoh", "hieroglyphs", "papyrus", "Thoth", "Osiris", "Ra", "Memphis", "Ramesses"]
     },
     "medieval_knight": {
         "name": "Sir Gareth of Camelot",
         "title": "Knight of the Round Table",
         "greeting": "Hail and well met! I am Sir Gareth, sworn knight of Camelot and defender of the realm.",
-        "personality": "Honorable, chivalrous, speaks of duty, valor, and the knightly code"
+        "personality": "Honorable, chivalrous, speaks of duty, valor, and the knightly code",
+        "vocabulary": ["Camelot", "King Arthur", "Round Table", "Excalibur", "Lancelot", "Gawain", "squire", "jousting"]
     },
     "viking_explorer": {
         "name": "Erik Thorsson",
         "title": "Norse Explorer and Warrior", 
         "greeting": "Hail, friend! I am Erik Thorsson, who has sailed beyond the edge of the world in search of glory and new lands!",
-        "personality": "Bold, adventurous, honor-bound, speaks of Norse gods and glorious deeds"
+        "personality": "Bold, adventurous, honor-bound, speaks of Norse gods and glorious deeds",
+        "vocabulary": ["Odin", "Thor", "Valhalla", "Vinland", "longship", "jarl", "Leif Erikson", "Asgard"]
     },
     "renaissance_master": {
         "name": "Leonardo da Vinci",
         "title": "Renaissance Master",
         "greeting": "Greetings, my curious friend! I am Leonardo, student of all creation and seeker of understanding in art, science, and nature.",
-        "personality": "Brilliant, endlessly curious, speaks of discovery, art, and the marvels of existence"
+        "personality": "Brilliant, endlessly curious, speaks of discovery, art, and the marvels of existence",
+        "vocabulary": ["Mona Lisa", "Florence", "Milan", "Medici", "Verrocchio", "sfumato", "Vitruvian Man", "The Last Supper"]
     }
 }
 
+def stt_initial_prompt(character_id: str) -> Optional[str]:
+    character = CHARACTERS.get(character_id)
+    if not character or not character.get("vocabulary"):
+        return None
+    return f"A conversation with {character['name']}, {character['title']}. {', '.join(character['vocabulary'])}."
+
+def choose_session_language(session, language: Optional[str]):
+    """Applies a client's language choice: "auto" unpins the session's language
+    so it is detected again, a language code pins it. Raises ValueError otherwise."""
+    if not language:
+        return
+    language = language.strip().lower()
+    if language == "auto":
+        session.set_language(None)
+    elif re.fullmatch(r"[a-z]{2,3}", language):
+        session.set_language(language)
+    else:
+        raise ValueError(f"language must be a language code such as 'en', or 'auto', got {language!r}")
+
 def should_use_rag(user_input: str) -> bool:
     rag_keywords = [
         "when", "where", "how", "why", "what", "built", "made", "during",
@@ -85,64 +128,140 @@ def should_use_rag(user_input: str) -> bool:
     
     return True
 
+async def learn_from_interaction(
+    character_id: str,
+    user_input: str,
+    historical_facts: List[Dict],
+    response_text: str
+):
+    try:
+        rag_learner = await get_rag_learner()
+        learning_result = await rag_learner.analyze_and_learn_from_interaction(
+            character_id=character_id,
+            user_query=user_input,
+            retrieved_facts=historical_facts,
+            llm_response=response_text
+        )
+        
+        if learning_result.get("learned", False):
+            logger.info(f"🎓 System learned from interaction: {user_input[:30]}...")
+            
+    except Exception as e:
+        logger.warning(f"⚠️ Learning system error (non-critical): {e}")
+
+async def lookup_cached_response(
+    character_id: str,
+    user_input: str,
+    conversation_history: List[Dict],
+    use_cache: bool = True
+) -> Tuple[Optional[Dict], Optional[List[float]]]:
+    try:
+        response_cache = get_response_cache()
+        
+        if not use_cache or response_cache.is_context_dependent(user_input, conversation_history):
+            response_cache.record_bypass()
+            return None, None
+        
+        query_embedding = await asyncio.to_thread(response_cache.encode_query, user_input)
+        return response_cache.lookup(character_id, query_embedding), query_embedding
+        
+    except Exception as e:
+        logger.warning(f"⚠️ Response cache error (non-critical): {e}")
+        return None, None
+
+def store_cached_response(
+    character_id: str,
+    user_input: str,
+    query_embedding,
+    response_data: Dict,
+    historical_facts: List[Dict],
+    conversation_history: Optional[List[Dict]]
+):
+    if query_embedding is None or response_data.get("error"):
+        return
+    
+    if conversation_history or response_data.get("context_reused"):
+        return
+    
+    try:
+        get_response_cache().store(
+            character_id=character_id,
+            query=user_input,
+            query_embedding=query_embedding,
+            response_text=response_data["response_text"],
+            historical_facts_used=len(historical_facts)
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Response cache store failed (non-critical): {e}")
+
 async def generate_rag_enhanced_response_with_memory(
     user_input: str, 
     character_id: str, 
     scene_context: str, 
-    session
-) -> str:
+    session,
+    use_cache: bool = True,
+    deadline: Optional[float] = None
+) -> Dict:
     try:
+        conversation_history = session.get_recent_context(max_exchanges=3)
+        
+        cached, query_embedding = await lookup_cached_response(
+            character_id, user_input, conversation_history, use_cache
+        )
+        if cached:
+            logger.info(f"🗃️ Served cached answer for: '{user_input[:50]}...'")
+            session.clear_llm_context()
+            return {"response_text": cached["response_text"], "served_by": "cache"}
+        
         start_rag = time.time()
         rag_service = get_rag_service()
         historical_facts = await rag_service.retrieve_relevant_facts(
             character_id=character_id,
             query=user_input,
-            max_results=3
+            max_results=3,
+            query_embedding=query_embedding.tolist() if query_embedding is not None else None
         )
         rag_time = time.time() - start_rag
         
         start_llm = time.time()
         llm_service = get_llm_service()
         
-        conversation_history = session.get_recent_context(max_exchanges=3)
-        
         response_data = await llm_service.generate_response(
             character_id=character_id,
             user_query=user_input,
             historical_facts=historical_facts,
-            conversation_history=conversation_history
+            conversation_history=conversation_history,
+            session=session,
+            deadline=deadline
         )
         llm_time = time.time() - start_llm
         
-        try:
-            rag_learner = await get_rag_learner()
-            learning_result = await rag_learner.analyze_and_learn_from_interaction(
-                character_id=character_id,
-                user_query=user_input,
-                retrieved_facts=historical_facts,
-                llm_response=response_data["response_text"]
-            )
-            
-            if learning_result.get("learned", False):
-                logger.info(f"🎓 System learned from interaction: {user_input[:30]}...")
-                
-        except Exception as e:
-            logger.warning(f"⚠️ Learning system error (non-critical): {e}")
+        store_cached_response(character_id, user_input, query_embedding, response_data, historical_facts, conversation_history)
+        
+        await learn_from_interaction(
+            character_id, user_input, historical_facts, response_data["response_text"]
+        )
         
-        logger.info(f"📚 RAG + LLM with memory: RAG {rag_time:.2f}s, LLM {llm_time:.2f}s")
-        return response_data["response_text"]
+        logger.info(f"📚 RAG + LLM with memory: RAG {rag_time:.2f}s, LLM {llm_time:.2f}s ({response_data.get('served_by')})")
+        return response_data
         
+    except LLMOverloadedError:
+        raise
     except Exception as e:
         logger.error(f"❌ RAG-enhanced response with memory failed: {e}")
         character = CHARACTERS.get(character_id, {})
-        return character.get("greeting", "I apologize, but I'm having trouble responding right now.")
+        return {
+            "response_text": character.get("greeting", "I apologize, but I'm having trouble responding right now."),
+            "served_by": "greeting_fallback"
+        }
 
 async def generate_conversational_response_with_memory(
     user_input: str, 
     character_id: str, 
     scene_context: str, 
-    session
-) -> str:
+    session,
+    deadline: Optional[float] = None
+) -> Dict:
     try:
         start_llm = time.time()
         llm_service = get_llm_service()
@@ -152,33 +271,398 @@ async def generate_conversational_response_with_memory(
         response_data = await llm_service.generate_simple_response_with_memory(
             character_id=character_id,
             user_query=user_input,
-            conversation_history=conversation_history
+            conversation_history=conversation_history,
+            session=session,
+            deadline=deadline
         )
         llm_time = time.time() - start_llm
         
-        logger.info(f"💬 LLM-only with memory: {llm_time:.2f}s")
-        return response_data["response_text"]
+        logger.info(f"💬 LLM-only with memory: {llm_time:.2f}s ({response_data.get('served_by')})")
+        return response_data
         
+    except LLMOverloadedError:
+        raise
     except Exception as e:
         logger.error(f"❌ Conversational response with memory failed: {e}")
         character = CHARACTERS.get(character_id, {})
-        return character.get("greeting", "Hello! I'd be happy to share my knowledge with you.")
+        return {
+            "response_text": character.get("greeting", "Hello! I'd be happy to share my knowledge with you."),
+            "served_by": "greeting_fallback"
+        }
 
 async def generate_adaptive_response_with_memory(
     user_input: str, 
     character_id: str, 
     scene_context: str, 
-    session
-) -> str:
+    session,
+    use_cache: bool = True,
+    deadline: Optional[float] = None
+) -> Dict:
     
     needs_historical_facts = should_use_rag(user_input)
     
     if needs_historical_facts:
         logger.info(f"🔍 Using RAG + LLM with memory for: '{user_input[:50]}...'")
-        return await generate_rag_enhanced_response_with_memory(user_input, character_id, scene_context, session)
+        return await generate_rag_enhanced_response_with_memory(
+            user_input, character_id, scene_context, session, use_cache, deadline
+        )
     else:
         logger.info(f"💬 Using LLM-only with memory for: '{user_input[:50]}...'")
-        return await generate_conversational_response_with_memory(user_input, character_id, scene_context, session)
+        return await generate_conversational_response_with_memory(
+            user_input, character_id, scene_context, session, deadline
+        )
+
+async def spool_audio_upload(audio_file: UploadFile) -> AudioSpool:
+    try:
+        spool = await AudioSpool.from_upload(audio_file, MAX_UPLOAD_BYTES, UPLOAD_MEMORY_BYTES, UPLOAD_SPOOL_DIR)
+    except UploadTooLargeError as e:
+        logger.warning(f"🚫 Rejecting audio upload {audio_file.filename}: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    if spool.size == 0:
+        spool.close()
+        raise HTTPException(status_code=400, detail="Empty audio file received")
+    
+    return spool
+
+def spooled_audio_input(spool: AudioSpool, content_type: Optional[str]):
+    try:
+        pcm_sample_rate = raw_pcm_sample_rate(content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid audio format: {e}")
+    duration = spool.size / 2 / pcm_sample_rate if pcm_sample_rate else spool.probe_duration()
+    if duration is not None and duration > MAX_AUDIO_SECONDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Audio is {duration:.0f}s long; the limit is {MAX_AUDIO_SECONDS:g}s"
+        )
+    
+    if pcm_sample_rate:
+        with spool.view() as data:
+            return resample(pcm16_to_float32(data), pcm_sample_rate)
+    return spool.source()
+
+async def transcribe_audio_upload(
+    spool: AudioSpool,
+    content_type: Optional[str],
+    session,
+    character_id: str
+) -> dict:
+    """Transcribes a spooled upload and takes ownership of the spool: it is
+    closed once the transcription job is done with it, which can be after a timeout."""
+    try:
+        audio_data = spooled_audio_input(spool, content_type)
+        stt_service = get_stt_service()
+    except BaseException:
+        spool.close()
+        raise
+    
+    try:
+        return await stt_service.transcribe_audio(
+            audio_data,
+            language=session.language,
+            initial_prompt=stt_initial_prompt(character_id),
+            on_release=spool.close
+        )
+    except STTOverloadedError as e:
+        logger.warning(f"🚦 Rejecting audio request: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Speech recognition is busy: {e}. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+async def resolve_transcript(
+    audio_file: Optional[UploadFile],
+    user_text: Optional[str],
+    session,
+    character_id: str
+) -> str:
+    if audio_file:
+        logger.info(f"🎤 Processing audio file: {audio_file.filename}")
+        
+        spool = await spool_audio_upload(audio_file)
+        stt_result = await transcribe_audio_upload(spool, audio_file.content_type, session, character_id)
+        
+        if stt_result.get("timed_out"):
+            raise HTTPException(status_code=504, detail=stt_result["error"])
+        
+        if not stt_result["success"]:
+            raise HTTPException(
+                status_code=422, 
+                detail=f"Could not transcribe audio: {stt_result.get('error', 'Unknown error')}"
+            )
+        
+        if stt_result["no_speech"]:
+            raise HTTPException(status_code=422, detail="No speech detected in audio")
+        
+        transcript = stt_result["transcript"]
+        if transcript:
+            session.pin_language(stt_result["language"], stt_result.get("language_probability"))
+        logger.info(f"🎯 Transcribed: '{transcript}'")
+        return transcript
+    
+    if user_text:
+        logger.info(f"💬 Text input: '{user_text}'")
+        return user_text
+    
+    raise HTTPException(
+        status_code=400, 
+        detail="Either audio_file or user_text must be provided"
+    )
+
+def overloaded_exception(error: LLMOverloadedError) -> HTTPException:
+    logger.warning(f"🚦 Rejecting dialogue request: {error}")
+    return HTTPException(
+        status_code=429,
+        detail=f"Character service is busy: {error}. Please retry shortly.",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+def format_sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def dialogue_events(
+    transcript: str,
+    character_id: str,
+    scene_context: str,
+    session,
+    timings: Dict[str, int],
+    start_time: float,
+    pipeline_tts: bool = True,
+    use_cache: bool = True
+) -> AsyncIterator[Tuple[str, Dict]]:
+    character = CHARACTERS[character_id]
+    historical_facts: List[Dict] = []
+    audio_url = None
+    speech_pipeline = None
+    
+    if pipeline_tts:
+        speech_pipeline = get_tts_service().start_speech_pipeline(character_id, session.session_id)
+    
+    try:
+        yield "transcript", {
+            "transcript": transcript,
+            "session_id": session.session_id
+        }
+        
+        if transcript.strip():
+            route = "rag" if should_use_rag(transcript) else "conversational"
+            
+            cached = None
+            query_embedding = None
+            
+            if route == "rag":
+                conversation_history = session.get_recent_context(max_exchanges=3)
+                cached, query_embedding = await lookup_cached_response(
+                    character_id, transcript, conversation_history, use_cache
+                )
+                
+                if not cached:
+                    start_rag = time.time()
+                    rag_service = get_rag_service()
+                    historical_facts = await rag_service.retrieve_relevant_facts(
+                        character_id=character_id,
+                        query=transcript,
+                        max_results=3,
+                        query_embedding=query_embedding.tolist() if query_embedding is not None else None
+                    )
+                    timings["rag_ms"] = int((time.time() - start_rag) * 1000)
+            else:
+                conversation_history = session.get_recent_context(max_exchanges=2)
+            
+            start_llm = time.time()
+            llm_service = get_llm_service()
+            response_text = ""
+            
+            if cached:
+                route = "cached"
+                session.clear_llm_context()
+                llm_events = cached_response_events(cached)
+            else:
+                llm_events = llm_service.stream_response(
+                    character_id=character_id,
+                    user_query=transcript,
+                    historical_facts=historical_facts,
+                    conversation_history=conversation_history,
+                    route=route,
+                    session=session
+                )
+            
+            async for event in llm_events:
+                if event["type"] == "token":
+                    if "first_token_ms" not in timings:
+                        timings["first_token_ms"] = int((time.time() - start_time) * 1000)
+                    yield "token", {"text": event["text"]}
+                    
+                    if speech_pipeline:
+                        speech_pipeline.feed(event["text"])
+                        for segment in speech_pipeline.ready():
+                            frame = audio_segment_frame(segment, timings, start_time)
+                            if frame:
+                                yield "audio", frame
+                else:
+                    response_text = event["response_text"]
+                    response_data = event
+            
+            timings["llm_ms"] = int((time.time() - start_llm) * 1000)
+            session.add_exchange(transcript, response_text)
+            
+            if route == "rag":
+                store_cached_response(character_id, transcript, query_embedding, response_data, historical_facts, conversation_history)
+                await learn_from_interaction(character_id, transcript, historical_facts, response_text)
+        else:
+            route = "greeting"
+            response_text = character["greeting"]
+            timings["first_token_ms"] = int((time.time() - start_time) * 1000)
+            yield "token", {"text": response_text}
+            
+            if speech_pipeline:
+                greeting_speech = await get_tts_service().get_greeting_speech(character_id, response_text, session.session_id)
+                frame = audio_segment_frame({**greeting_speech, "segment_index": 0, "text": response_text}, timings, start_time)
+                if frame:
+                    yield "audio", frame
+        
+        if speech_pipeline:
+            start_tts = time.time()
+            speech_pipeline.close()
+            async for segment in speech_pipeline.drain():
+                frame = audio_segment_frame(segment, timings, start_time)
+                if frame:
+                    yield "audio", frame
+            timings["tts_ms"] = int((time.time() - start_tts) * 1000)
+        else:
+            try:
+                start_tts = time.time()
+                tts_service = get_tts_service()
+                speech_result = await tts_service.generate_character_speech(
+                    character_id=character_id,
+                    text=response_text,
+                    session_id=session.session_id
+                )
+                timings["tts_ms"] = int((time.time() - start_tts) * 1000)
+                
+                if speech_result["success"]:
+                    audio_url = speech_result["audio_url"]
+                else:
+                    logger.warning(f"⚠️ TTS generation failed: {speech_result.get('error')}")
+                    
+            except Exception as e:
+                logger.warning(f"⚠️ TTS service error (non-critical): {e}")
+        
+        timings["total_ms"] = int((time.time() - start_time) * 1000)
+        logger.info(f"✅ Streamed dialogue: {timings}, Session: {session.session_id}")
+        
+        yield "done", {
+            "success": True,
+            "transcript": transcript,
+            "response_text": response_text,
+            "character_id": character_id,
+            "scene_context": scene_context,
+            "route": route,
+            "audio_url": audio_url,
+            "audio_segments": [
+                segment["audio_url"] for segment in speech_pipeline.segments if segment["success"]
+            ] if speech_pipeline else [],
+            "session_id": session.session_id,
+            "timings": timings,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except LLMOverloadedError as e:
+        logger.warning(f"🚦 Streaming dialogue rejected: {e}")
+        yield "error", {
+            "success": False,
+            "error": str(e),
+            "status_code": 429,
+            "retry_after": e.retry_after,
+            "session_id": session.session_id
+        }
+    except Exception as e:
+        logger.error(f"❌ Streaming dialogue failed: {e}")
+        yield "error", {
+            "success": False,
+            "error": str(e),
+            "session_id": session.session_id
+        }
+    finally:
+        if speech_pipeline:
+            speech_pipeline.cancel()
+
+async def stream_dialogue_events(
+    transcript: str,
+    character_id: str,
+    scene_context: str,
+    session,
+    timings: Dict[str, int],
+    start_time: float,
+    pipeline_tts: bool = True,
+    use_cache: bool = True
+) -> AsyncIterator[str]:
+    async for event, data in dialogue_events(
+        transcript, character_id, scene_context, session, timings, start_time, pipeline_tts, use_cache
+    ):
+        yield format_sse(event, data)
+
+async def cached_response_events(cached: Dict) -> AsyncIterator[Dict]:
+    yield {"type": "token", "text": cached["response_text"]}
+    yield {"type": "done", "response_text": cached["response_text"]}
+
+def audio_segment_frame(segment: Dict, timings: Dict[str, int], start_time: float) -> Optional[Dict]:
+    if not segment["success"]:
+        logger.warning(f"⚠️ TTS segment {segment.get('segment_index')} failed: {segment.get('error')}")
+        return None
+    
+    if "first_audio_ms" not in timings:
+        timings["first_audio_ms"] = int((time.time() - start_time) * 1000)
+    
+    return {
+        "segment_index": segment["segment_index"],
+        "text": segment["text"],
+        "audio_url": segment["audio_url"]
+    }
+
+@router.post("/dialogue/stream")
+async def create_dialogue_stream(
+    character_id: str = Form(...),
+    scene_context: str = Form(default="general"),
+    audio_file: Optional[UploadFile] = File(None),
+    user_text: Optional[str] = Form(None),
+    session_id: Optional[str] = Form(None),
+    pipeline_tts: bool = Form(default=True),
+    use_cache: bool = Form(default=True),
+    language: Optional[str] = Form(None)
+):
+    start_time = time.time()
+    
+    if character_id not in CHARACTERS:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Unknown character: {character_id}. Available: {list(CHARACTERS.keys())}"
+        )
+    
+    try:
+        get_llm_service().scheduler.check_admission()
+    except LLMOverloadedError as e:
+        raise overloaded_exception(e)
+    
+    session_manager = get_session_manager()
+    session = session_manager.get_or_create_session(character_id, session_id)
+    try:
+        choose_session_language(session, language)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    transcript = await resolve_transcript(audio_file, user_text, session, character_id)
+    timings = {"stt_ms": int((time.time() - start_time) * 1000)}
+    
+    return StreamingResponse(
+        stream_dialogue_events(
+            transcript, character_id, scene_context, session, timings, start_time, pipeline_tts, use_cache
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/dialogue", response_model=DialogueResponse)
 async def create_dialogue(
@@ -186,10 +670,17 @@ async def create_dialogue(
     scene_context: str = Form(default="general"),
     audio_file: Optional[UploadFile] = File(None),
     user_text: Optional[str] = Form(None),
-    session_id: Optional[str] = Form(None)
+    session_id: Optional[str] = Form(None),
+    use_cache: bool = Form(default=True),
+    latency_budget_ms: Optional[int] = Form(None),
+    language: Optional[str] = Form(None)
 ):
     start_time = time.time()
     
+    if latency_budget_ms is None:
+        latency_budget_ms = DEFAULT_LATENCY_BUDGET_MS
+    deadline = start_time + latency_budget_ms / 1000 if latency_budget_ms > 0 else None
+    
     try:
         if character_id not in CHARACTERS:
             raise HTTPException(
@@ -199,45 +690,22 @@ async def create_dialogue(
         
         session_manager = get_session_manager()
         session = session_manager.get_or_create_session(character_id, session_id)
+        try:
+            choose_session_language(session, language)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         character = CHARACTERS[character_id]
-        transcript = ""
         audio_url = None
         
-        if audio_file:
-            logger.info(f"🎤 Processing audio file: {audio_file.filename}")
-            
-            audio_data = await audio_file.read()
-            
-            if len(audio_data) == 0:
-                raise HTTPException(status_code=400, detail="Empty audio file received")
-            
-            stt_service = get_stt_service()
-            stt_result = await stt_service.transcribe_audio(audio_data)
-            
-            if not stt_result["success"]:
-                raise HTTPException(
-                    status_code=422, 
-                    detail=f"Could not transcribe audio: {stt_result.get('error', 'Unknown error')}"
-                )
-            
-            transcript = stt_result["transcript"]
-            logger.info(f"🎯 Transcribed: '{transcript}'")
-            
-        elif user_text:
-            transcript = user_text
-            logger.info(f"💬 Text input: '{transcript}'")
-            
-        else:
-            raise HTTPException(
-                status_code=400, 
-                detail="Either audio_file or user_text must be provided"
-            )
+        transcript = await resolve_transcript(audio_file, user_text, session, character_id)
         
         if transcript.strip():
-            response_text = await generate_adaptive_response_with_memory(
-                transcript, character_id, scene_context, session
+            response_data = await generate_adaptive_response_with_memory(
+                transcript, character_id, scene_context, session, use_cache, deadline
             )
+            response_text = response_data["response_text"]
+            served_by = response_data.get("served_by")
             
             session.add_exchange(transcript, response_text)
             
@@ -262,10 +730,11 @@ async def create_dialogue(
                 
         else:
             response_text = character["greeting"]
+            served_by = "greeting"
             
             try:
                 tts_service = get_tts_service()
-                greeting_speech = await tts_service.generate_character_speech(
+                greeting_speech = await tts_service.get_greeting_speech(
                     character_id=character_id,
                     text=response_text,
                     session_id=session.session_id
@@ -287,11 +756,14 @@ async def create_dialogue(
             scene_context=scene_context,
             processing_time_ms=processing_time,
             audio_url=audio_url,
-            session_id=session.session_id
+            session_id=session.session_id,
+            served_by=served_by
         )
         
     except HTTPException:
         raise
+    except LLMOverloadedError as e:
+        raise overloaded_exception(e)
     except Exception as e:
         processing_time = int((time.time() - start_time) * 1000)
         logger.error(f"❌ Dialogue processing failed: {e}")
@@ -345,6 +817,17 @@ async def get_llm_info():
     except Exception as e:
         return {"error": str(e), "status": "unavailable"}
 
+@router.get("/cache/info")
+async def get_cache_info():
+    try:
+        return get_response_cache().get_stats()
+    except Exception as e:
+        return {"error": str(e), "status": "unavailable"}
+
+@router.get("/inflight/info")
+async def get_inflight_info():
+    return get_single_flight_stats()
+
 @router.get("/tts/info")
 async def get_tts_info():
     try:
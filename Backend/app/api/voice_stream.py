@@ -0,0 +1,261 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import time
+import logging
+
+import numpy as np
+
+from .dialogue import CHARACTERS, choose_session_language, dialogue_events, stt_initial_prompt
+from ..core.session_manager import get_session_manager
+from ..core.stt import get_stt_service, STTOverloadedError
+from ..utils.audio_processing import (
+    EnergyVAD,
+    OpusPacketDecoder,
+    PCM16StreamDecoder,
+    RAW_PCM_RATE_RANGE,
+    TARGET_SAMPLE_RATE
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+class StreamingTranscriber:
+    """Transcribes VAD segments in arrival order while more audio keeps coming in.
+
+    Starts from the session's pinned language, if any; otherwise the language
+    detected on the first segment is reused for the rest of the utterance so
+    short segments don't flip between languages.
+    """
+
+    def __init__(
+        self,
+        stt_service,
+        send: Callable[[Dict], Awaitable[None]],
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None
+    ):
+        self.stt_service = stt_service
+        self.send = send
+        self.texts: List[str] = []
+        self.language = language
+        self.language_probability: Optional[float] = None
+        self.initial_prompt = initial_prompt
+        self.segment_count = 0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    @property
+    def transcript(self) -> str:
+        return " ".join(self.texts)
+
+    def add_segment(self, samples: np.ndarray):
+        self.queue.put_nowait(samples)
+
+    async def _run(self):
+        while True:
+            samples = await self.queue.get()
+            if samples is None:
+                return
+
+            segment_index = self.segment_count
+            self.segment_count += 1
+
+            try:
+                result = await self.stt_service.transcribe_audio(samples, self.language, self.initial_prompt)
+            except STTOverloadedError as e:
+                logger.warning(f"🚦 Dropping streamed segment {segment_index}: {e}")
+                await self.send({
+                    "type": "error",
+                    "segment_index": segment_index,
+                    "error": str(e),
+                    "status_code": 429,
+                    "retry_after": e.retry_after
+                })
+                continue
+
+            if not result["success"]:
+                await self.send({
+                    "type": "error",
+                    "segment_index": segment_index,
+                    "error": result.get("error", "Unknown error")
+                })
+                continue
+
+            if result["transcript"]:
+                if self.language is None and result["language"] != "unknown":
+                    self.language = result["language"]
+                    self.language_probability = result["language_probability"]
+                self.texts.append(result["transcript"])
+                await self.send({
+                    "type": "partial",
+                    "segment_index": segment_index,
+                    "text": result["transcript"],
+                    "transcript": self.transcript
+                })
+
+    async def finish(self) -> str:
+        self.queue.put_nowait(None)
+        await self.task
+        return self.transcript
+
+    def cancel(self):
+        self.task.cancel()
+
+@router.websocket("/dialogue/ws")
+async def dialogue_websocket(
+    websocket: WebSocket,
+    character_id: str,
+    session_id: Optional[str] = None,
+    scene_context: str = "general",
+    encoding: str = "pcm16",
+    sample_rate: int = TARGET_SAMPLE_RATE,
+    end_of_turn_ms: int = 1500,
+    pipeline_tts: bool = True,
+    use_cache: bool = True,
+    language: Optional[str] = None
+):
+    await websocket.accept()
+
+    if character_id not in CHARACTERS:
+        await websocket.send_json({"type": "error", "error": f"Unknown character: {character_id}. Available: {list(CHARACTERS.keys())}"})
+        await websocket.close(code=1008)
+        return
+
+    if encoding == "opus":
+        try:
+            decoder = OpusPacketDecoder()
+        except RuntimeError as e:
+            await websocket.send_json({"type": "error", "error": str(e)})
+            await websocket.close(code=1003)
+            return
+    elif encoding == "pcm16":
+        low, high = RAW_PCM_RATE_RANGE
+        if not low <= sample_rate <= high:
+            await websocket.send_json({"type": "error", "error": f"sample_rate must be between {low} and {high} Hz"})
+            await websocket.close(code=1003)
+            return
+        decoder = PCM16StreamDecoder(sample_rate)
+    else:
+        await websocket.send_json({"type": "error", "error": f"Unsupported encoding: {encoding}. Use pcm16 or opus"})
+        await websocket.close(code=1003)
+        return
+
+    session = get_session_manager().get_or_create_session(character_id, session_id)
+    try:
+        choose_session_language(session, language)
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "error": str(e)})
+        await websocket.close(code=1003)
+        return
+    stt_service = get_stt_service()
+    vad = EnergyVAD(end_of_turn_ms=end_of_turn_ms)
+    send_lock = asyncio.Lock()
+
+    async def send(message: Dict):
+        async with send_lock:
+            await websocket.send_json(message)
+
+    initial_prompt = stt_initial_prompt(character_id)
+
+    def new_transcriber() -> StreamingTranscriber:
+        return StreamingTranscriber(stt_service, send, session.language, initial_prompt)
+
+    async def feed_audio(transcriber: StreamingTranscriber, samples: np.ndarray) -> bool:
+        """Runs decoded audio through the VAD; returns True when it ends the turn."""
+        end_turn = False
+        for kind, segment in vad.feed(samples):
+            if kind == "speech_start":
+                await send({"type": "vad", "state": "speech_start"})
+            elif kind == "segment":
+                await send({
+                    "type": "vad",
+                    "state": "speech_end",
+                    "duration_ms": int(len(segment) / TARGET_SAMPLE_RATE * 1000)
+                })
+                transcriber.add_segment(segment)
+            elif kind == "turn_end":
+                end_turn = True
+        return end_turn
+
+    async def finish_turn(transcriber: StreamingTranscriber, explicit: bool):
+        start_time = time.time()
+        if explicit:
+            await feed_audio(transcriber, decoder.flush())
+        trailing_segment = vad.flush()
+        if trailing_segment is not None:
+            transcriber.add_segment(trailing_segment)
+
+        transcript = await transcriber.finish()
+        session.pin_language(transcriber.language, transcriber.language_probability)
+        timings = {"stt_ms": int((time.time() - start_time) * 1000)}
+        await send({
+            "type": "final",
+            "transcript": transcript,
+            "language": session.language,
+            "session_id": session.session_id
+        })
+
+        if not transcript.strip() and not explicit:
+            return
+
+        logger.info(f"🎙️ Streamed utterance for {character_id}: '{transcript}' (STT tail {timings['stt_ms']}ms)")
+        async for event, data in dialogue_events(
+            transcript, character_id, scene_context, session, timings, start_time, pipeline_tts, use_cache
+        ):
+            await send({"type": event, **data})
+
+    logger.info(f"🔌 Voice stream opened for {character_id}, Session: {session.session_id}")
+    await send({
+        "type": "ready",
+        "session_id": session.session_id,
+        "encoding": encoding,
+        "sample_rate": TARGET_SAMPLE_RATE
+    })
+
+    transcriber = new_transcriber()
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            end_turn = False
+            explicit = False
+
+            if message.get("bytes") is not None:
+                end_turn = await feed_audio(transcriber, decoder.decode(message["bytes"]))
+            elif message.get("text") is not None:
+                try:
+                    control = json.loads(message["text"])
+                except json.JSONDecodeError:
+                    control = None
+                if not isinstance(control, dict):
+                    await send({"type": "error", "error": "Control messages must be JSON objects"})
+                    continue
+
+                if control.get("type") == "end":
+                    end_turn = True
+                    explicit = True
+                elif control.get("type") == "reset":
+                    transcriber.cancel()
+                    decoder.flush()
+                    vad.reset()
+                    transcriber = new_transcriber()
+                else:
+                    await send({"type": "error", "error": f"Unknown control message: {control.get('type')}"})
+
+            if end_turn:
+                await finish_turn(transcriber, explicit)
+                transcriber = new_transcriber()
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"❌ Voice stream failed: {e}")
+    finally:
+        transcriber.cancel()
+        logger.info(f"🔌 Voice stream closed, Session: {session.session_id}")
@@ -1,47 +1,181 @@
-import ollama
+import httpx
 import logging
-from typing import Dict, List, Optional
+import os
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
+import time
+import asyncio
+import threading
+
+from .single_flight import get_single_flight, normalize_flight_text
+from .llm_scheduler import LLMScheduler, LLMOverloadedError
+from .ollama_pool import OllamaBackendPool, parse_model_names
+from .prompt_assembler import PromptAssembler, TokenCounter
 
 logger = logging.getLogger(__name__)
 
+class LLMDeadlineExceeded(Exception):
+    pass
+
+class StreamingResponseCleaner:
+    """Applies _clean_response-style prefix removal to a token stream.
+
+    The head of the stream is held back while it could still grow into one of
+    the character prefixes, and trailing whitespace is held until more text
+    arrives, so the concatenated output matches the non-streaming cleanup.
+    """
+    
+    def __init__(self, clean_fn: Callable[[str], str], prefixes: List[str]):
+        self.clean_fn = clean_fn
+        self.prefixes = prefixes
+        self._head = ""
+        self._head_done = False
+        self._pending_whitespace = ""
+        self.text = ""
+    
+    def feed(self, delta: str) -> str:
+        if not delta:
+            return ""
+        
+        if not self._head_done:
+            self._head += delta
+            head = self._head.lstrip()
+            if self._could_become_prefix(head):
+                return ""
+            cleaned = self.clean_fn(head)
+            if cleaned != head and self._could_become_prefix(cleaned):
+                return ""
+            self._head_done = True
+            return self._emit(cleaned.rstrip() + head[len(head.rstrip()):])
+        
+        return self._emit(delta)
+    
+    def flush(self) -> str:
+        if not self._head_done:
+            self._head_done = True
+            return self._emit(self.clean_fn(self._head.strip()))
+        return ""
+    
+    def _could_become_prefix(self, text: str) -> bool:
+        return any(prefix.startswith(text) for prefix in self.prefixes)
+    
+    def _emit(self, text: str) -> str:
+        text = self._pending_whitespace + text
+        stripped = text.rstrip()
+        self._pending_whitespace = text[len(stripped):]
+        if not self.text:
+            stripped = stripped.lstrip()
+        self.text += stripped
+        return stripped
+
 class HistoricalCharacterLLM:
     
-    def __init__(self, model_name: str = "llama3.2:3b"):
+    def __init__(
+        self, 
+        model_name: str = "llama3.2:3b",
+        host: str = "http://127.0.0.1:12345",
+        hosts: Optional[List[str]] = None,
+        max_connections: int = 16,
+        max_keepalive_connections: int = 8,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        reuse_context: bool = True,
+        context_ttl_seconds: int = 300,
+        context_token_limit: int = 1536,
+        max_concurrent_generations: int = 2,
+        max_queued_generations: int = 16,
+        queue_timeout: float = 30.0,
+        eject_after_failures: int = 2,
+        eject_seconds: float = 30.0,
+        health_check_interval: float = 15.0,
+        hedge_delay: float = 2.0,
+        min_generation_budget: float = 1.0,
+        tokenizer_name: Optional[str] = None,
+        prompt_budgets: Optional[Dict[str, int]] = None,
+        keep_alive: Optional[str] = "30m"
+    ):
         self.model_name = model_name
-        self.client = ollama.Client(host='http://127.0.0.1:12345')
+        self.hosts = hosts or [host]
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.reuse_context = reuse_context
+        self.context_ttl_seconds = context_ttl_seconds
+        self.context_token_limit = context_token_limit
+        self.hedge_delay = hedge_delay
+        self.min_generation_budget = min_generation_budget
+        self.keep_alive = keep_alive
+        self.served_by_stats: Dict[str, int] = {}
+        self.prompt_eval_stats = {
+            "full": {"requests": 0, "prompt_tokens": 0, "prompt_eval_ms": 0.0},
+            "reused": {"requests": 0, "prompt_tokens": 0, "prompt_eval_ms": 0.0}
+        }
+        
+        self.scheduler = LLMScheduler(
+            max_concurrent=max_concurrent_generations * len(self.hosts),
+            max_queue=max_queued_generations,
+            queue_timeout=queue_timeout
+        )
+        
+        self.pool = OllamaBackendPool(
+            hosts=self.hosts,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            ),
+            eject_after_failures=eject_after_failures,
+            eject_seconds=eject_seconds,
+            health_check_interval=health_check_interval
+        )
+        self.prompt_assembler = PromptAssembler(TokenCounter(tokenizer_name), prompt_budgets)
         self.character_personas = self._load_character_personas()
         logger.info(f"🧠 Initializing Historical Character LLM with model: {model_name}")
         self._verify_model()
     
     def _verify_model(self):
-        try:
-            logger.info("🔍 Connecting to Ollama at 127.0.0.1:12345")
-            models = self.client.list()
-            
-            if 'models' in models:
-                available_models = []
-                for model in models['models']:
-                    if 'name' in model:
-                        available_models.append(model['name'])
-                    elif 'model' in model:
-                        available_models.append(model['model'])
-                    elif isinstance(model, str):
-                        available_models.append(model)
-            else:
-                available_models = [str(model) for model in models if model]
-            
-            logger.info(f"📋 Available models: {available_models}")
-            
-            if self.model_name in available_models:
-                logger.info(f"✅ LLM model {self.model_name} is ready")
-            else:
-                logger.warning(f"⚠️ Model {self.model_name} not found. Available: {available_models}")
-                logger.info("🔄 Attempting to continue anyway...")
+        for backend in self.pool.backends:
+            try:
+                logger.info(f"🔍 Connecting to Ollama at {backend.host}")
+                models = backend.client.list()
+                available_models = parse_model_names(models)
+                backend.available_models = available_models
                 
-        except Exception as e:
-            logger.error(f"❌ Failed to verify Ollama model: {e}")
-            logger.info("🔄 Continuing without model verification...")
+                logger.info(f"📋 Available models on {backend.host}: {available_models}")
+                
+                if self.model_name in available_models:
+                    logger.info(f"✅ LLM model {self.model_name} is ready on {backend.host}")
+                else:
+                    logger.warning(f"⚠️ Model {self.model_name} not found. Available: {available_models}")
+                    logger.info("🔄 Attempting to continue anyway...")
+                    
+            except Exception as e:
+                logger.error(f"❌ Failed to verify Ollama model on {backend.host}: {e}")
+                logger.info("🔄 Continuing without model verification...")
+                backend.healthy = False
+                backend.last_error = str(e)
+    
+    async def warm_up(self) -> Dict[str, Dict]:
+        async def warm_backend(backend) -> Dict:
+            start = time.time()
+            try:
+                await backend.async_client.generate(
+                    model=self.model_name,
+                    prompt="Hello",
+                    options={"num_predict": 1},
+                    keep_alive=self.keep_alive
+                )
+                latency_ms = (time.time() - start) * 1000
+                logger.info(f"🔥 Ollama model {self.model_name} warm on {backend.host} in {latency_ms:.0f}ms")
+                return {"success": True, "load_ms": round(latency_ms, 1)}
+            except Exception as e:
+                backend.last_error = str(e)
+                logger.warning(f"⚠️ Ollama warmup failed on {backend.host}: {e}")
+                return {"success": False, "error": str(e)}
+        
+        results = await asyncio.gather(*(warm_backend(backend) for backend in self.pool.backends))
+        return dict(zip(self.hosts, results))
     
     def _load_character_personas(self) -> Dict[str, Dict]:
         return {
@@ -106,34 +240,36 @@ class HistoricalCharacterLLM:
         character_id: str, 
         user_query: str, 
         historical_facts: List[Dict], 
-        conversation_history: List[Dict] = None
+        conversation_history: List[Dict] = None,
+        session=None,
+        deadline: Optional[float] = None
     ) -> Dict[str, str]:
         
         if character_id not in self.character_personas:
             raise ValueError(f"Unknown character: {character_id}")
         
         try:
-            prompt = self._build_character_prompt(
-                character_id, user_query, historical_facts, conversation_history
+            prompt, context = self._prepare_prompt(
+                "rag", character_id, user_query, historical_facts, conversation_history, session
             )
             
             logger.info(f"🎭 Generating response for {character_id}: '{user_query[:50]}...'")
             
-            response = self.client.generate(
-                model=self.model_name,
+            response = await self._generate(
                 prompt=prompt,
-                options={
-                    'temperature': 0.7,
-                    'max_tokens': 100,
-                    'num_predict': 100,
-                    'top_p': 0.8,
-                    'repeat_penalty': 1.1,
-                    'stop': ['\n\nUser:', '\n\nHuman:', '\n\nQ:']
-                }
+                options=self._generation_options("rag"),
+                context=context,
+                route="rag",
+                flight_key=self._flight_key(
+                    "rag", character_id, user_query, historical_facts, conversation_history, context
+                ),
+                preferred_host=self._preferred_host(session, context),
+                deadline=deadline
             )
             
             response_text = response['response'].strip()
             response_text = self._clean_response(response_text, character_id)
+            prompt_metrics = self._record_generation(response, session, context is not None)
             
             logger.info(f"✅ Generated {len(response_text)} character response")
             
@@ -142,11 +278,21 @@ class HistoricalCharacterLLM:
                 "character_id": character_id,
                 "model_used": self.model_name,
                 "historical_facts_used": len(historical_facts),
+                "served_by": self._record_served_by(response.get("served_by", "primary")),
+                **prompt_metrics,
                 "timestamp": datetime.now().isoformat()
             }
             
+        except LLMOverloadedError:
+            raise
         except Exception as e:
-            logger.error(f"❌ LLM generation failed for {character_id}: {e}")
+            deadline_exceeded = isinstance(e, LLMDeadlineExceeded)
+            if deadline_exceeded:
+                logger.warning(f"⏱️ Serving template answer for {character_id}: {e}")
+            else:
+                logger.error(f"❌ LLM generation failed for {character_id}: {e}")
+            if session is not None:
+                session.clear_llm_context()
             
             fallback_response = self._generate_fallback_response(
                 character_id, user_query, historical_facts
@@ -156,6 +302,7 @@ class HistoricalCharacterLLM:
                 "response_text": fallback_response,
                 "character_id": character_id,
                 "model_used": "fallback_template",
+                "served_by": self._record_served_by("template_deadline" if deadline_exceeded else "template_error"),
                 "error": str(e),
                 "timestamp": datetime.now().isoformat()
             }
@@ -174,15 +321,11 @@ class HistoricalCharacterLLM:
             
             logger.info(f"💬 Generating simple response for {character_id}")
             
-            response = self.client.generate(
-                model=self.model_name,
+            response = await self._generate(
                 prompt=prompt,
-                options={
-                    'temperature': 0.8,
-                    'max_tokens': 80,
-                    'num_predict': 80,
-                    'top_p': 0.8
-                }
+                options=self._generation_options("conversational"),
+                route="simple",
+                flight_key=self._flight_key("simple", character_id, user_query)
             )
             
             response_text = response['response'].strip()
@@ -198,6 +341,8 @@ class HistoricalCharacterLLM:
                 "timestamp": datetime.now().isoformat()
             }
             
+        except LLMOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"❌ Simple response generation failed: {e}")
             
@@ -216,30 +361,36 @@ class HistoricalCharacterLLM:
         self, 
         character_id: str, 
         user_query: str,
-        conversation_history: List[Dict] = None
+        conversation_history: List[Dict] = None,
+        session=None,
+        deadline: Optional[float] = None
     ) -> Dict[str, str]:
         
         if character_id not in self.character_personas:
             raise ValueError(f"Unknown character: {character_id}")
         
         try:
-            prompt = self._build_simple_prompt_with_memory(character_id, user_query, conversation_history)
+            prompt, context = self._prepare_prompt(
+                "conversational", character_id, user_query, None, conversation_history, session
+            )
             
             logger.info(f"💬 Generating simple response with memory for {character_id}")
             
-            response = self.client.generate(
-                model=self.model_name,
+            response = await self._generate(
                 prompt=prompt,
-                options={
-                    'temperature': 0.8,
-                    'max_tokens': 80,
-                    'num_predict': 80,
-                    'top_p': 0.8
-                }
+                options=self._generation_options("conversational"),
+                context=context,
+                route="conversational",
+                flight_key=self._flight_key(
+                    "conversational", character_id, user_query, None, conversation_history, context
+                ),
+                preferred_host=self._preferred_host(session, context),
+                deadline=deadline
             )
             
             response_text = response['response'].strip()
             response_text = self._clean_response(response_text, character_id)
+            prompt_metrics = self._record_generation(response, session, context is not None)
             
             logger.info(f"✅ Generated simple response with memory: {len(response_text)} chars")
             
@@ -248,11 +399,21 @@ class HistoricalCharacterLLM:
                 "character_id": character_id,
                 "model_used": self.model_name,
                 "response_type": "conversational_with_memory",
+                "served_by": self._record_served_by(response.get("served_by", "primary")),
+                **prompt_metrics,
                 "timestamp": datetime.now().isoformat()
             }
             
+        except LLMOverloadedError:
+            raise
         except Exception as e:
-            logger.error(f"❌ Simple response with memory failed: {e}")
+            deadline_exceeded = isinstance(e, LLMDeadlineExceeded)
+            if deadline_exceeded:
+                logger.warning(f"⏱️ Serving template answer for {character_id}: {e}")
+            else:
+                logger.error(f"❌ Simple response with memory failed: {e}")
+            if session is not None:
+                session.clear_llm_context()
             
             persona = self.character_personas[character_id]
             fallback = f"Greetings! I am {persona['name']}, {persona['role']}. How may I assist you today?"
@@ -261,10 +422,325 @@ class HistoricalCharacterLLM:
                 "response_text": fallback,
                 "character_id": character_id,
                 "model_used": "fallback_simple",
+                "served_by": self._record_served_by("template_deadline" if deadline_exceeded else "template_error"),
                 "error": str(e),
                 "timestamp": datetime.now().isoformat()
             }
     
+    async def stream_response(
+        self, 
+        character_id: str, 
+        user_query: str, 
+        historical_facts: Optional[List[Dict]] = None, 
+        conversation_history: List[Dict] = None,
+        route: str = "rag",
+        session=None
+    ) -> AsyncIterator[Dict]:
+        
+        if character_id not in self.character_personas:
+            raise ValueError(f"Unknown character: {character_id}")
+        
+        historical_facts = historical_facts or []
+        
+        prompt, context = self._prepare_prompt(
+            route, character_id, user_query, historical_facts, conversation_history, session
+        )
+        
+        logger.info(f"🌊 Streaming {route} response for {character_id}: '{user_query[:50]}...'")
+        
+        cleaner = StreamingResponseCleaner(
+            lambda text: self._clean_response(text, character_id),
+            self._response_prefixes(character_id)
+        )
+        start_time = time.time()
+        first_token_ms = None
+        
+        final_part: Dict = {}
+        
+        try:
+            async for part in self._generate_stream(
+                prompt, 
+                self._generation_options(route), 
+                context=context, 
+                route=route,
+                preferred_host=self._preferred_host(session, context)
+            ):
+                if part.get('done'):
+                    final_part = part
+                delta = cleaner.feed(part.get('response', ''))
+                if delta:
+                    if first_token_ms is None:
+                        first_token_ms = int((time.time() - start_time) * 1000)
+                    yield {"type": "token", "text": delta}
+            
+            delta = cleaner.flush()
+            if delta:
+                yield {"type": "token", "text": delta}
+            
+            prompt_metrics = self._record_generation(final_part, session, context is not None)
+            logger.info(f"✅ Streamed {len(cleaner.text)} character response")
+            
+            yield {
+                "type": "done",
+                "response_text": cleaner.text,
+                "character_id": character_id,
+                "model_used": self.model_name,
+                "response_type": route,
+                **prompt_metrics,
+                "first_token_ms": first_token_ms,
+                "generation_time_ms": int((time.time() - start_time) * 1000),
+                "timestamp": datetime.now().isoformat()
+            }
+            
+        except LLMOverloadedError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Streaming generation failed for {character_id}: {e}")
+            if session is not None:
+                session.clear_llm_context()
+            
+            response_text = cleaner.text
+            if not response_text:
+                if route == "rag":
+                    response_text = self._generate_fallback_response(
+                        character_id, user_query, historical_facts
+                    )
+                else:
+                    persona = self.character_personas[character_id]
+                    response_text = f"Greetings! I am {persona['name']}, {persona['role']}. How may I assist you today?"
+                yield {"type": "token", "text": response_text}
+            
+            yield {
+                "type": "done",
+                "response_text": response_text,
+                "character_id": character_id,
+                "model_used": self.model_name if cleaner.text else "fallback_template",
+                "response_type": route,
+                "first_token_ms": first_token_ms,
+                "generation_time_ms": int((time.time() - start_time) * 1000),
+                "error": str(e),
+                "timestamp": datetime.now().isoformat()
+            }
+    
+    def _generation_options(self, route: str) -> Dict:
+        if route == "rag":
+            return {
+                'temperature': 0.7,
+                'max_tokens': 100,
+                'num_predict': 100,
+                'top_p': 0.8,
+                'repeat_penalty': 1.1,
+                'stop': ['\n\nUser:', '\n\nHuman:', '\n\nQ:']
+            }
+        return {
+            'temperature': 0.8,
+            'max_tokens': 80,
+            'num_predict': 80,
+            'top_p': 0.8
+        }
+    
+    def _flight_key(
+        self,
+        route: str,
+        character_id: str,
+        user_query: str,
+        historical_facts: Optional[List[Dict]] = None,
+        conversation_history: Optional[List[Dict]] = None,
+        context: Optional[List[int]] = None
+    ) -> Tuple:
+        return (
+            self.model_name,
+            route,
+            character_id,
+            normalize_flight_text(user_query),
+            tuple(fact.get('text', '') for fact in historical_facts or []),
+            tuple((exchange.get('user', ''), exchange.get('character', '')) for exchange in conversation_history or []),
+            hash(tuple(context)) if context else None
+        )
+    
+    async def _generate(
+        self, 
+        prompt: str, 
+        options: Dict, 
+        context: Optional[List[int]] = None,
+        route: str = "rag",
+        flight_key: Optional[Tuple] = None,
+        preferred_host: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Dict:
+        remaining = self._remaining_budget(deadline)
+        if remaining is not None and remaining < self.min_generation_budget:
+            raise LLMDeadlineExceeded(f"only {remaining:.2f}s of latency budget left")
+        
+        def request():
+            if remaining is None:
+                return self._request_generate(prompt, options, context, route, preferred_host)
+            return self._hedged_generate(prompt, options, context, route, preferred_host, deadline)
+        
+        if flight_key is None:
+            generation = request()
+        else:
+            generation = get_single_flight("llm").run(flight_key, request)
+        
+        if remaining is None:
+            return await generation
+        
+        try:
+            return await asyncio.wait_for(generation, timeout=remaining)
+        except asyncio.TimeoutError:
+            raise LLMDeadlineExceeded(f"generation did not finish within {remaining:.2f}s")
+    
+    async def _hedged_generate(
+        self, 
+        prompt: str, 
+        options: Dict, 
+        context: Optional[List[int]],
+        route: str,
+        preferred_host: Optional[str],
+        deadline: float
+    ) -> Dict:
+        primary_backend = self.pool.select(preferred_host)
+        primary_host = primary_backend.host if primary_backend else preferred_host
+        tasks = {
+            asyncio.create_task(self._request_generate(prompt, options, context, route, primary_host)): "primary"
+        }
+        
+        try:
+            hedge_after = min(self.hedge_delay, max(deadline - time.time() - self.min_generation_budget, 0))
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            
+            if not done and self._can_hedge(primary_host):
+                logger.info(f"🪁 Hedging {route} generation after {hedge_after:.2f}s (primary: {primary_host})")
+                hedge_task = asyncio.create_task(
+                    self._request_generate(prompt, options, context, route, exclude=[primary_host])
+                )
+                tasks[hedge_task] = "hedge"
+            
+            last_error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return {**task.result(), "served_by": tasks[task]}
+                    last_error = task.exception()
+            
+            raise last_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def _can_hedge(self, primary_host: Optional[str]) -> bool:
+        if not self.scheduler.has_capacity():
+            return False
+        return bool(self.pool.available_backends(exclude=[primary_host]))
+    
+    def _remaining_budget(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return None
+        return deadline - time.time()
+    
+    def _record_served_by(self, served_by: str) -> str:
+        self.served_by_stats[served_by] = self.served_by_stats.get(served_by, 0) + 1
+        return served_by
+    
+    async def _request_generate(
+        self, 
+        prompt: str, 
+        options: Dict, 
+        context: Optional[List[int]] = None,
+        route: str = "rag",
+        preferred_host: Optional[str] = None,
+        exclude: Optional[List[str]] = None
+    ) -> Dict:
+        async with self.scheduler.slot(route):
+            async with self.pool.acquire(preferred_host, exclude) as backend:
+                response = await backend.async_client.generate(
+                    model=self.model_name,
+                    prompt=prompt,
+                    options=options,
+                    context=context,
+                    keep_alive=self.keep_alive
+                )
+                return {**response, "host": backend.host}
+    
+    async def _generate_stream(
+        self, 
+        prompt: str, 
+        options: Dict, 
+        context: Optional[List[int]] = None,
+        route: str = "rag",
+        preferred_host: Optional[str] = None
+    ) -> AsyncIterator[Dict]:
+        async with self.scheduler.slot(route):
+            async with self.pool.acquire(preferred_host) as backend:
+                stream = await backend.async_client.generate(
+                    model=self.model_name,
+                    prompt=prompt,
+                    options=options,
+                    context=context,
+                    stream=True,
+                    keep_alive=self.keep_alive
+                )
+                async for part in stream:
+                    yield {**part, "host": backend.host}
+    
+    def _preferred_host(self, session, context: Optional[List[int]]) -> Optional[str]:
+        return session.llm_context_host if session is not None and context else None
+    
+    def _prepare_prompt(
+        self,
+        route: str,
+        character_id: str,
+        user_query: str,
+        historical_facts: Optional[List[Dict]],
+        conversation_history: Optional[List[Dict]],
+        session=None
+    ) -> Tuple[str, Optional[List[int]]]:
+        context = None
+        
+        if session is not None and self.reuse_context:
+            context = session.get_llm_context(self.model_name, self.context_ttl_seconds)
+            if context and len(context) > self.context_token_limit:
+                logger.info(f"📏 LLM context for {session.session_id[:8]}... exceeds {self.context_token_limit} tokens, rebuilding prompt")
+                session.clear_llm_context()
+                context = None
+        
+        if context:
+            prompt = self._build_continuation_prompt(
+                character_id, user_query, historical_facts if route == "rag" else None
+            )
+            return prompt, context
+        
+        if route == "rag":
+            return self._build_character_prompt(
+                character_id, user_query, historical_facts or [], conversation_history
+            ), None
+        
+        return self._build_simple_prompt_with_memory(character_id, user_query, conversation_history), None
+    
+    def _record_generation(self, response: Dict, session, context_reused: bool) -> Dict:
+        if session is not None and self.reuse_context:
+            session.set_llm_context(response.get('context'), self.model_name, response.get('host'))
+        
+        prompt_eval_count = response.get('prompt_eval_count') or 0
+        prompt_eval_ms = (response.get('prompt_eval_duration') or 0) / 1_000_000
+        
+        stats = self.prompt_eval_stats["reused" if context_reused else "full"]
+        stats["requests"] += 1
+        stats["prompt_tokens"] += prompt_eval_count
+        stats["prompt_eval_ms"] += prompt_eval_ms
+        
+        logger.info(f"🧮 Prompt eval: {prompt_eval_count} tokens in {prompt_eval_ms:.0f}ms (context reused: {context_reused})")
+        
+        return {
+            "context_reused": context_reused,
+            "prompt_eval_count": prompt_eval_count,
+            "prompt_eval_ms": round(prompt_eval_ms, 1)
+        }
+    
     def _build_character_prompt(
         self, 
         character_id: str, 
@@ -275,29 +751,30 @@ class HistoricalCharacterLLM:
         
         persona = self.character_personas[character_id]
         
-        facts_context = "\n".join([
-            f"- {fact['text']}" for fact in historical_facts[:3]
-        ]) if historical_facts else "Use your general historical knowledge."
-        
-        history_context = ""
-        if conversation_history:
-            recent_history = conversation_history[-2:]
-            for exchange in recent_history:
-                history_context += f"User: {exchange.get('user', '')}\nYou: {exchange.get('character', '')}\n"
-        
-        prompt = f"""You are {persona['name']}, a {persona['role']} in ancient times.
+        prefix = self.prompt_assembler.persona_prefix(character_id, "rag", lambda: f"""You are {persona['name']}, a {persona['role']} in ancient times.
 
 CHARACTER BACKGROUND:
 - Personality: {persona['personality']}
 - Speech Style: {persona['speech_style']}
 - Background: {persona['background']}
 
-HISTORICAL CONTEXT (use this information):
+""")
+        
+        def render_body(query: str, facts: List[Dict], history: List[Dict]) -> str:
+            facts_context = "\n".join([
+                f"- {fact['text']}" for fact in facts
+            ]) if facts else "Use your general historical knowledge."
+            
+            history_context = ""
+            for exchange in history:
+                history_context += f"User: {exchange.get('user', '')}\nYou: {exchange.get('character', '')}\n"
+            
+            return f"""HISTORICAL CONTEXT (use this information):
 {facts_context}
 
 {history_context if history_context else ""}
 
-USER: "{user_query}"
+USER: "{query}"
 
 INSTRUCTIONS:
 1. Respond as {persona['name']} in character
@@ -308,60 +785,98 @@ INSTRUCTIONS:
 
 {persona['name']}:"""
 
-        return prompt
+        return self.prompt_assembler.assemble(
+            "rag", render_body, user_query, historical_facts, conversation_history, prefix=prefix
+        )
     
-    def _build_simple_prompt(self, character_id: str, user_query: str) -> str:
+    def _simple_persona_prefix(self, character_id: str) -> Tuple[str, int]:
         persona = self.character_personas[character_id]
-        
-        prompt = f"""You are {persona['name']}, a {persona['role']}.
+        return self.prompt_assembler.persona_prefix(character_id, "conversational", lambda: f"""You are {persona['name']}, a {persona['role']}.
 
 Personality: {persona['personality']}
 Speech Style: {persona['speech_style']}
 
-USER: "{user_query}"
+""")
+    
+    def _build_simple_prompt(self, character_id: str, user_query: str) -> str:
+        persona = self.character_personas[character_id]
+        
+        def render_body(query: str, facts: List[Dict], history: List[Dict]) -> str:
+            return f"""USER: "{query}"
 
 Respond as {persona['name']} with a friendly, brief response (1-2 sentences):
 
 {persona['name']}:"""
 
-        return prompt
+        return self.prompt_assembler.assemble(
+            "conversational", render_body, user_query, prefix=self._simple_persona_prefix(character_id)
+        )
     
     def _build_simple_prompt_with_memory(self, character_id: str, user_query: str, conversation_history: List[Dict] = None) -> str:
         persona = self.character_personas[character_id]
         
-        history_context = ""
-        if conversation_history:
-            recent_history = conversation_history[-2:]
-            for exchange in recent_history:
+        def render_body(query: str, facts: List[Dict], history: List[Dict]) -> str:
+            history_context = ""
+            for exchange in history:
                 history_context += f"You: {exchange.get('character', '')}\nUser: {exchange.get('user', '')}\n"
+            
+            return f"""{f"RECENT CONVERSATION:{chr(10)}{history_context}{chr(10)}" if history_context else ""}
+
+USER: "{query}"
+
+Respond as {persona['name']} with a friendly, brief response (1-2 sentences). Reference the conversation if relevant:
+
+{persona['name']}:"""
+
+        return self.prompt_assembler.assemble(
+            "conversational", render_body, user_query,
+            conversation_history=conversation_history, prefix=self._simple_persona_prefix(character_id)
+        )
+    
+    def _build_continuation_prompt(
+        self, 
+        character_id: str, 
+        user_query: str, 
+        historical_facts: Optional[List[Dict]] = None
+    ) -> str:
+        persona = self.character_personas[character_id]
         
-        prompt = f"""You are {persona['name']}, a {persona['role']}.
+        def render_body(query: str, facts: List[Dict], history: List[Dict]) -> str:
+            if historical_facts is not None:
+                facts_context = "\n".join([
+                    f"- {fact['text']}" for fact in facts
+                ]) if facts else "Use your general historical knowledge."
+                
+                return f"""HISTORICAL CONTEXT (use this information):
+{facts_context}
 
-Personality: {persona['personality']}
-Speech Style: {persona['speech_style']}
+USER: "{query}"
 
-{f"RECENT CONVERSATION:{chr(10)}{history_context}{chr(10)}" if history_context else ""}
+Respond as {persona['name']} in character, 2-3 sentences, referencing personal experience:
 
-USER: "{user_query}"
+{persona['name']}:"""
+            
+            return f"""USER: "{query}"
 
 Respond as {persona['name']} with a friendly, brief response (1-2 sentences). Reference the conversation if relevant:
 
 {persona['name']}:"""
 
-        return prompt
+        return self.prompt_assembler.assemble("continuation", render_body, user_query, historical_facts)
     
-    def _clean_response(self, response_text: str, character_id: str) -> str:
+    def _response_prefixes(self, character_id: str) -> List[str]:
         persona = self.character_personas[character_id]
         
-        prefixes_to_remove = [
+        return [
             f"{persona['name']} responds:",
             f"{persona['name']}:",
             f"Response as {persona['name']}:",
             "I respond:",
             "Response:",
         ]
-        
-        for prefix in prefixes_to_remove:
+    
+    def _clean_response(self, response_text: str, character_id: str) -> str:
+        for prefix in self._response_prefixes(character_id):
             if response_text.startswith(prefix):
                 response_text = response_text[len(prefix):].strip()
         
@@ -385,16 +900,89 @@ Respond as {persona['name']} with a friendly, brief response (1-2 sentences). Re
     def get_model_info(self) -> Dict[str, str]:
         return {
             "model_name": self.model_name,
-            "host": "127.0.0.1:12345",
+            "host": self.hosts[0],
+            "hosts": self.hosts,
             "characters_available": len(self.character_personas),
-            "status": "ready" if self.client else "unavailable",
-            "features": ["rag_enhanced", "conversational", "adaptive_routing", "memory_support"]
+            "status": "ready" if self.pool.get_info()["healthy_backends"] else "degraded",
+            "connection_pool": {
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive_connections,
+                "connect_timeout_s": self.connect_timeout,
+                "read_timeout_s": self.read_timeout
+            },
+            "prompt_reuse": self.get_prompt_reuse_stats(),
+            "prompt_budget": self.prompt_assembler.get_stats(),
+            "single_flight": get_single_flight("llm").get_stats(),
+            "scheduler": self.scheduler.get_stats(),
+            "backend_pool": self.pool.get_info(),
+            "deadlines": {
+                "hedge_delay_s": self.hedge_delay,
+                "min_generation_budget_s": self.min_generation_budget,
+                "served_by": dict(self.served_by_stats)
+            },
+            "features": ["rag_enhanced", "conversational", "adaptive_routing", "memory_support", "async_pooled_client", "context_reuse", "token_budgeted_prompts"]
+        }
+    
+    def get_prompt_reuse_stats(self) -> Dict:
+        summary = {
+            "enabled": self.reuse_context,
+            "context_ttl_seconds": self.context_ttl_seconds,
+            "context_token_limit": self.context_token_limit
         }
+        for mode, stats in self.prompt_eval_stats.items():
+            requests = stats["requests"]
+            summary[mode] = {
+                "requests": requests,
+                "avg_prompt_tokens": round(stats["prompt_tokens"] / requests, 1) if requests else 0,
+                "avg_prompt_eval_ms": round(stats["prompt_eval_ms"] / requests, 1) if requests else 0
+            }
+        return summary
+    
+    async def aclose(self):
+        await self.pool.aclose()
+        logger.info("🔌 Closed Ollama connection pool")
 
 _llm_instance: Optional[HistoricalCharacterLLM] = None
+_llm_instance_lock = threading.Lock()
 
 def get_llm_service() -> HistoricalCharacterLLM:
     global _llm_instance
-    if _llm_instance is None:
-        _llm_instance = HistoricalCharacterLLM()
+    if _llm_instance is not None:
+        return _llm_instance
+    
+    with _llm_instance_lock:
+        if _llm_instance is None:
+            _llm_instance = HistoricalCharacterLLM(
+                model_name=os.getenv("OLLAMA_MODEL", "llama3.2:3b"),
+                host=os.getenv("OLLAMA_HOST", "http://127.0.0.1:12345"),
+                hosts=[host.strip() for host in os.getenv("OLLAMA_HOSTS", "").split(",") if host.strip()] or None,
+                max_connections=int(os.getenv("OLLAMA_MAX_CONNECTIONS", "16")),
+                max_keepalive_connections=int(os.getenv("OLLAMA_MAX_KEEPALIVE", "8")),
+                connect_timeout=float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5")),
+                read_timeout=float(os.getenv("OLLAMA_READ_TIMEOUT", "60")),
+                reuse_context=os.getenv("LLM_REUSE_CONTEXT", "true").lower() == "true",
+                context_ttl_seconds=int(os.getenv("LLM_CONTEXT_TTL", "300")),
+                context_token_limit=int(os.getenv("LLM_CONTEXT_TOKEN_LIMIT", "1536")),
+                max_concurrent_generations=int(os.getenv("LLM_MAX_CONCURRENT", "2")),
+                max_queued_generations=int(os.getenv("LLM_MAX_QUEUE", "16")),
+                queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "30")),
+                eject_after_failures=int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "2")),
+                eject_seconds=float(os.getenv("OLLAMA_EJECT_SECONDS", "30")),
+                health_check_interval=float(os.getenv("OLLAMA_HEALTH_CHECK_INTERVAL", "15")),
+                hedge_delay=float(os.getenv("LLM_HEDGE_DELAY", "2")),
+                min_generation_budget=float(os.getenv("LLM_MIN_GENERATION_BUDGET", "1")),
+                tokenizer_name=os.getenv("LLM_TOKENIZER") or None,
+                prompt_budgets={
+                    "rag": int(os.getenv("LLM_PROMPT_BUDGET_RAG", "640")),
+                    "conversational": int(os.getenv("LLM_PROMPT_BUDGET_CONVERSATIONAL", "384")),
+                    "continuation": int(os.getenv("LLM_PROMPT_BUDGET_CONTINUATION", "256"))
+                },
+                keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+            )
     return _llm_instance
+
+async def shutdown_llm_service():
+    global _llm_instance
+    if _llm_instance is not None:
+        await _llm_instance.aclose()
+        _llm_instance = None
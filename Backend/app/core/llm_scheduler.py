@@ -0,0 +1,135 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class LLMOverloadedError(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class LLMScheduler:
+    """Admission control in front of Ollama.
+
+    At most max_concurrent generations run at once; the rest wait in a
+    bounded priority queue (lower value is served first) and are rejected
+    with LLMOverloadedError when the queue is full or the wait times out.
+    """
+    
+    ROUTE_PRIORITIES = {
+        "conversational": 0,
+        "simple": 0,
+        "rag": 1
+    }
+    
+    def __init__(self, max_concurrent: int = 2, max_queue: int = 16, queue_timeout: float = 30.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._queued = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._avg_service_s = 3.0
+        self.stats = {
+            "admitted": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0
+        }
+        logger.info(f"🚦 LLM scheduler ready: {max_concurrent} concurrent, queue of {max_queue}")
+    
+    @asynccontextmanager
+    async def slot(self, route: str = "rag") -> AsyncIterator[None]:
+        wait_start = time.time()
+        await self._acquire(self.ROUTE_PRIORITIES.get(route, 1))
+        
+        wait_ms = (time.time() - wait_start) * 1000
+        self.stats["admitted"] += 1
+        self.stats["total_wait_ms"] += wait_ms
+        self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], wait_ms)
+        if wait_ms > 100:
+            logger.info(f"⏳ {route} generation waited {wait_ms:.0f}ms for an LLM slot")
+        
+        service_start = time.time()
+        try:
+            yield
+        finally:
+            service_s = time.time() - service_start
+            self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * service_s
+            self._release()
+    
+    def has_capacity(self) -> bool:
+        return self._active < self.max_concurrent and self._queued == 0
+    
+    def check_admission(self):
+        if self._active >= self.max_concurrent and self._queued >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise LLMOverloadedError("LLM queue is full", self.estimate_retry_after())
+    
+    def estimate_retry_after(self) -> int:
+        backlog = self._queued + 1
+        return max(1, math.ceil(backlog * self._avg_service_s / self.max_concurrent))
+    
+    async def _acquire(self, priority: int):
+        if self._active < self.max_concurrent and self._queued == 0:
+            self._active += 1
+            return
+        
+        self.check_admission()
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._queued += 1
+        
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                self._release()
+            else:
+                future.cancel()
+                self._queued -= 1
+            
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats["timed_out"] += 1
+                raise LLMOverloadedError(
+                    f"Timed out after {self.queue_timeout:g}s waiting for an LLM slot",
+                    self.estimate_retry_after()
+                )
+            raise
+    
+    def _release(self):
+        self._active -= 1
+        
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._queued -= 1
+                self._active += 1
+                future.set_result(None)
+                return
+    
+    def get_stats(self) -> Dict:
+        admitted = self.stats["admitted"]
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout,
+            "active": self._active,
+            "queue_depth": self._queued,
+            "admitted": admitted,
+            "rejected": self.stats["rejected"],
+            "timed_out": self.stats["timed_out"],
+            "avg_wait_ms": round(self.stats["total_wait_ms"] / admitted, 1) if admitted else 0.0,
+            "max_wait_ms": round(self.stats["max_wait_ms"], 1),
+            "avg_service_s": round(self._avg_service_s, 2),
+            "estimated_retry_after_s": self.estimate_retry_after()
+        }
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Mapping, Optional
+
+import httpx
+import ollama
+
+logger = logging.getLogger(__name__)
+
+def parse_model_names(models: Mapping) -> List[str]:
+    if 'models' in models:
+        available_models = []
+        for model in models['models']:
+            if 'name' in model:
+                available_models.append(model['name'])
+            elif 'model' in model:
+                available_models.append(model['model'])
+            elif isinstance(model, str):
+                available_models.append(model)
+        return available_models
+    
+    return [str(model) for model in models if model]
+
+class OllamaBackend:
+    
+    def __init__(self, host: str, timeout: httpx.Timeout, limits: httpx.Limits):
+        self.host = host
+        self.client = ollama.Client(host=host, timeout=timeout)
+        self.async_client = ollama.AsyncClient(host=host, timeout=timeout, limits=limits)
+        self.in_flight = 0
+        self.healthy = True
+        self.ejected_until = 0.0
+        self.consecutive_failures = 0
+        self.total_requests = 0
+        self.total_failures = 0
+        self.latency_ewma_ms: Optional[float] = None
+        self.available_models: List[str] = []
+        self.last_error: Optional[str] = None
+    
+    def is_available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+    
+    def get_info(self) -> Dict:
+        return {
+            "host": self.host,
+            "healthy": self.healthy,
+            "ejected": time.time() < self.ejected_until,
+            "in_flight": self.in_flight,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+            "latency_ewma_ms": round(self.latency_ewma_ms, 1) if self.latency_ewma_ms is not None else None,
+            "available_models": self.available_models,
+            "last_error": self.last_error
+        }
+
+class OllamaBackendPool:
+    """Routes generations across several Ollama hosts.
+
+    Each request goes to the healthy backend with the fewest in-flight
+    requests. Backends that fail repeatedly are ejected for eject_seconds
+    before being tried again; a passing list() probe does not cut that
+    short. Backends that fail the periodic probe are skipped until a probe
+    passes again.
+    """
+    
+    def __init__(
+        self, 
+        hosts: List[str], 
+        timeout: httpx.Timeout, 
+        limits: httpx.Limits,
+        eject_after_failures: int = 2,
+        eject_seconds: float = 30.0,
+        health_check_interval: float = 15.0
+    ):
+        if not hosts:
+            raise ValueError("At least one Ollama host is required")
+        
+        self.backends = [OllamaBackend(host, timeout, limits) for host in hosts]
+        self.eject_after_failures = eject_after_failures
+        self.eject_seconds = eject_seconds
+        self.health_check_interval = health_check_interval
+        self._health_task: Optional[asyncio.Task] = None
+        logger.info(f"🌐 Ollama backend pool: {', '.join(hosts)}")
+    
+    @property
+    def hosts(self) -> List[str]:
+        return [backend.host for backend in self.backends]
+    
+    def available_backends(self, exclude: Optional[List[str]] = None) -> List[OllamaBackend]:
+        now = time.time()
+        exclude = exclude or []
+        return [
+            backend for backend in self.backends 
+            if backend.host not in exclude and backend.is_available(now)
+        ]
+    
+    def select(self, preferred_host: Optional[str] = None, exclude: Optional[List[str]] = None) -> Optional[OllamaBackend]:
+        exclude = exclude or []
+        candidates = self.available_backends(exclude)
+        
+        if not candidates:
+            remaining = [backend for backend in self.backends if backend.host not in exclude]
+            if not remaining:
+                return None
+            logger.warning("⚠️ No healthy Ollama backends, trying the one closest to recovery")
+            return min(remaining, key=lambda backend: backend.ejected_until)
+        
+        least_loaded = min(
+            candidates, 
+            key=lambda backend: (backend.in_flight, backend.latency_ewma_ms or 0.0)
+        )
+        
+        if preferred_host:
+            for backend in candidates:
+                if backend.host == preferred_host and backend.in_flight <= least_loaded.in_flight + 1:
+                    return backend
+        
+        return least_loaded
+    
+    @asynccontextmanager
+    async def acquire(
+        self, 
+        preferred_host: Optional[str] = None, 
+        exclude: Optional[List[str]] = None
+    ) -> AsyncIterator[OllamaBackend]:
+        self.start_health_checks()
+        
+        backend = self.select(preferred_host, exclude)
+        if backend is None:
+            raise RuntimeError("No Ollama backend available")
+        
+        backend.in_flight += 1
+        backend.total_requests += 1
+        start_time = time.time()
+        
+        try:
+            yield backend
+        except Exception as e:
+            self.record_failure(backend, e)
+            raise
+        else:
+            self.record_success(backend, (time.time() - start_time) * 1000)
+        finally:
+            backend.in_flight -= 1
+    
+    def record_success(self, backend: OllamaBackend, latency_ms: float):
+        backend.consecutive_failures = 0
+        if backend.latency_ewma_ms is None:
+            backend.latency_ewma_ms = latency_ms
+        else:
+            backend.latency_ewma_ms = 0.8 * backend.latency_ewma_ms + 0.2 * latency_ms
+    
+    def record_failure(self, backend: OllamaBackend, error: Exception):
+        backend.consecutive_failures += 1
+        backend.total_failures += 1
+        backend.last_error = str(error)
+        
+        if backend.consecutive_failures >= self.eject_after_failures:
+            backend.ejected_until = time.time() + self.eject_seconds
+            logger.warning(f"🚫 Ejecting Ollama backend {backend.host} for {self.eject_seconds:g}s after {backend.consecutive_failures} failures: {error}")
+    
+    async def check_health(self):
+        for backend in self.backends:
+            try:
+                models = await backend.async_client.list()
+                backend.available_models = parse_model_names(models)
+                if not backend.healthy:
+                    logger.info(f"✅ Ollama backend {backend.host} passed its health check again")
+                backend.healthy = True
+            except Exception as e:
+                if backend.healthy:
+                    logger.warning(f"⚠️ Ollama backend {backend.host} failed health check: {e}")
+                backend.healthy = False
+                backend.last_error = str(e)
+    
+    def start_health_checks(self):
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_check_loop())
+    
+    async def _health_check_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.check_health()
+    
+    def get_info(self) -> Dict:
+        return {
+            "backends": [backend.get_info() for backend in self.backends],
+            "healthy_backends": len(self.available_backends()),
+            "eject_after_failures": self.eject_after_failures,
+            "eject_seconds": self.eject_seconds,
+            "health_check_interval_s": self.health_check_interval
+        }
+    
+    async def aclose(self):
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        for backend in self.backends:
+            await backend.async_client._client.aclose()
+            backend.client._client.close()
@@ -0,0 +1,177 @@
+import logging
+import math
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class TokenCounter:
+    """Counts tokens with the model's Hugging Face tokenizer when it can be
+    loaded, otherwise estimates them.
+
+    The estimate is deliberately conservative: three characters per token,
+    where Llama-family tokenizers average about four on English text. Names,
+    numbers and non-English text tokenize worse than that, so the extra room
+    keeps estimated prompts within their budget without the real tokenizer.
+    """
+
+    CHARS_PER_TOKEN = 3
+
+    def __init__(self, tokenizer_name: Optional[str] = None, cache_size: int = 2048):
+        self.tokenizer = None
+        self.method = "estimate"
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+
+        if tokenizer_name:
+            try:
+                from transformers import AutoTokenizer
+                self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+                self.method = tokenizer_name
+                logger.info(f"🔢 Prompt token counting with tokenizer: {tokenizer_name}")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load tokenizer {tokenizer_name}, estimating tokens instead: {e}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            return cached
+
+        if self.tokenizer is not None:
+            tokens = len(self.tokenizer.encode(text, add_special_tokens=False))
+        else:
+            tokens = math.ceil(len(text) / self.CHARS_PER_TOKEN)
+
+        self._cache[text] = tokens
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return tokens
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        if self.tokenizer is not None:
+            token_ids = self.tokenizer.encode(text, add_special_tokens=False)
+            return self.tokenizer.decode(token_ids[:max_tokens]).strip()
+        return text[:max_tokens * self.CHARS_PER_TOKEN].strip()
+
+class PromptAssembler:
+    """Fits prompts into a per-route token budget.
+
+    Persona prefixes are rendered and counted once per character. When a
+    prompt is over budget the oldest history exchanges are dropped first,
+    then the least relevant facts, and as a last resort the user query is
+    truncated.
+    """
+
+    DEFAULT_BUDGETS = {
+        "rag": 640,
+        "conversational": 384,
+        "continuation": 256
+    }
+
+    def __init__(
+        self,
+        counter: TokenCounter,
+        budgets: Optional[Dict[str, int]] = None,
+        max_facts: int = 3,
+        max_history: int = 2,
+        min_query_tokens: int = 32
+    ):
+        self.counter = counter
+        self.budgets = {**self.DEFAULT_BUDGETS, **(budgets or {})}
+        self.max_facts = max_facts
+        self.max_history = max_history
+        self.min_query_tokens = min_query_tokens
+        self._prefixes: Dict[Tuple[str, str], Tuple[str, int]] = {}
+        self.stats = {
+            route: {"prompts": 0, "prompt_tokens": 0, "over_budget": 0, "history_trimmed": 0, "facts_trimmed": 0, "queries_truncated": 0}
+            for route in self.budgets
+        }
+
+    def persona_prefix(self, character_id: str, variant: str, render: Callable[[], str]) -> Tuple[str, int]:
+        key = (character_id, variant)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            text = render()
+            prefix = (text, self.counter.count(text))
+            self._prefixes[key] = prefix
+        return prefix
+
+    def assemble(
+        self,
+        route: str,
+        render_body: Callable[[str, List[Dict], List[Dict]], str],
+        user_query: str,
+        historical_facts: Optional[List[Dict]] = None,
+        conversation_history: Optional[List[Dict]] = None,
+        prefix: Optional[Tuple[str, int]] = None
+    ) -> str:
+        budget = self.budgets[route]
+        stats = self.stats[route]
+        prefix_text, prefix_tokens = prefix or ("", 0)
+
+        facts = sorted(
+            historical_facts or [],
+            key=lambda fact: fact.get('relevance_score', 0),
+            reverse=True
+        )[:self.max_facts]
+        history = list(conversation_history or [])[-self.max_history:]
+        query = user_query
+        over_budget = False
+
+        while True:
+            body = render_body(query, facts, history)
+            tokens = prefix_tokens + self.counter.count(body)
+            if tokens <= budget:
+                break
+
+            over_budget = True
+            if history:
+                history.pop(0)
+                stats["history_trimmed"] += 1
+            elif facts:
+                facts.pop()
+                stats["facts_trimmed"] += 1
+            else:
+                query_tokens = self.counter.count(query)
+                allowed = max(query_tokens - (tokens - budget), self.min_query_tokens)
+                if allowed < query_tokens:
+                    query = self.counter.truncate(query, allowed)
+                    stats["queries_truncated"] += 1
+                    body = render_body(query, facts, history)
+                    tokens = prefix_tokens + self.counter.count(body)
+                if tokens > budget:
+                    logger.warning(f"📏 {route} prompt still {tokens} tokens after trimming (budget {budget})")
+                break
+
+        stats["prompts"] += 1
+        stats["prompt_tokens"] += tokens
+        if over_budget:
+            stats["over_budget"] += 1
+            logger.info(f"✂️ Trimmed {route} prompt to {tokens} tokens (budget {budget})")
+
+        return prefix_text + body
+
+    def get_stats(self) -> Dict:
+        routes = {}
+        for route, stats in self.stats.items():
+            prompts = stats["prompts"]
+            routes[route] = {
+                "budget_tokens": self.budgets[route],
+                "prompts": prompts,
+                "avg_prompt_tokens": round(stats["prompt_tokens"] / prompts, 1) if prompts else 0,
+                "over_budget": stats["over_budget"],
+                "history_trimmed": stats["history_trimmed"],
+                "facts_trimmed": stats["facts_trimmed"],
+                "queries_truncated": stats["queries_truncated"]
+            }
+        return {
+            "token_counter": self.counter.method,
+            "cached_persona_prefixes": len(self._prefixes),
+            "routes": routes
+        }
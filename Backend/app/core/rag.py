@@ -1,11 +1,15 @@
+import asyncio
 import chromadb
 from sentence_transformers import SentenceTransformer
 import logging
 from typing import List, Dict, Optional
 import json
 import os
+import threading
 from datetime import datetime
 
+from .single_flight import get_single_flight, normalize_flight_text
+
 logger = logging.getLogger(__name__)
 
 class HistoricalKnowledgeBase:
@@ -89,7 +93,23 @@ class HistoricalKnowledgeBase:
         self, 
         character_id: str, 
         query: str, 
-        max_results: int = 3
+        max_results: int = 3,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, str]]:
+        
+        flight_key = (character_id, normalize_flight_text(query), max_results)
+        relevant_facts = await get_single_flight("rag").run(
+            flight_key,
+            lambda: asyncio.to_thread(self._retrieve_relevant_facts, character_id, query, max_results, query_embedding)
+        )
+        return list(relevant_facts)
+    
+    def _retrieve_relevant_facts(
+        self, 
+        character_id: str, 
+        query: str, 
+        max_results: int,
+        query_embedding: Optional[List[float]]
     ) -> List[Dict[str, str]]:
         
         if character_id not in self.collections:
@@ -99,7 +119,8 @@ class HistoricalKnowledgeBase:
         try:
             collection = self.collections[character_id]
             
-            query_embedding = self.encoder.encode(query).tolist()
+            if query_embedding is None:
+                query_embedding = self.encoder.encode(query).tolist()
             
             results = collection.query(
                 query_embeddings=[query_embedding],
@@ -131,6 +152,13 @@ class HistoricalKnowledgeBase:
             logger.error(f"❌ Failed to retrieve facts for {character_id}: {e}")
             return []
     
+    def warm_up(self):
+        query_embedding = self.encoder.encode("Tell me about your life.").tolist()
+        for character_id, collection in self.collections.items():
+            if collection.count() > 0:
+                collection.query(query_embeddings=[query_embedding], n_results=1)
+        logger.info("🔥 Knowledge base warmed up")
+    
     def get_collection_stats(self, character_id: str) -> Dict[str, int]:
         if character_id not in self.collections:
             return {"error": "Character not found"}
@@ -149,9 +177,14 @@ class HistoricalKnowledgeBase:
             return {"error": str(e)}
 
 _rag_instance: Optional[HistoricalKnowledgeBase] = None
+_rag_instance_lock = threading.Lock()
 
 def get_rag_service() -> HistoricalKnowledgeBase:
     global _rag_instance
-    if _rag_instance is None:
-        _rag_instance = HistoricalKnowledgeBase()
+    if _rag_instance is not None:
+        return _rag_instance
+    
+    with _rag_instance_lock:
+        if _rag_instance is None:
+            _rag_instance = HistoricalKnowledgeBase()
     return _rag_instance
@@ -0,0 +1,152 @@
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .rag import get_rag_service
+
+logger = logging.getLogger(__name__)
+
+class SemanticResponseCache:
+    
+    CONTEXT_MARKERS = [
+        "that", "this", "those", "these", "it", "they", "them", "he", "she",
+        "you mentioned", "you said", "earlier", "before", "again", "more about",
+        "what else", "and then", "after that"
+    ]
+    
+    def __init__(
+        self, 
+        similarity_threshold: float = 0.9, 
+        ttl_seconds: int = 3600, 
+        max_entries_per_character: int = 256
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_character = max_entries_per_character
+        self.entries: Dict[str, "OrderedDict[str, Dict]"] = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "evictions": 0
+        }
+        logger.info(f"🗃️ Semantic response cache initialized (threshold {similarity_threshold}, TTL {ttl_seconds}s)")
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        rag_service = get_rag_service()
+        return rag_service.encoder.encode(query, normalize_embeddings=True)
+    
+    def is_context_dependent(self, query: str, conversation_history: Optional[List[Dict]] = None) -> bool:
+        if not conversation_history:
+            return False
+        
+        query_lower = f" {self._normalize(query)} "
+        return any(f" {marker} " in query_lower for marker in self.CONTEXT_MARKERS)
+    
+    def record_bypass(self):
+        self.stats["bypassed"] += 1
+    
+    def lookup(self, character_id: str, query_embedding: np.ndarray) -> Optional[Dict]:
+        character_entries = self.entries.get(character_id)
+        if not character_entries:
+            self.stats["misses"] += 1
+            return None
+        
+        self._evict_expired(character_entries)
+        
+        best_key = None
+        best_score = -1.0
+        for key, entry in character_entries.items():
+            score = float(np.dot(query_embedding, entry["embedding"]))
+            if score > best_score:
+                best_key, best_score = key, score
+        
+        if best_key is None or best_score < self.similarity_threshold:
+            self.stats["misses"] += 1
+            return None
+        
+        character_entries.move_to_end(best_key)
+        entry = character_entries[best_key]
+        entry["hits"] += 1
+        self.stats["hits"] += 1
+        
+        logger.info(f"🎯 Response cache hit for {character_id} (similarity {best_score:.3f}): '{entry['query'][:50]}...'")
+        
+        return {
+            "response_text": entry["response_text"],
+            "cached_query": entry["query"],
+            "similarity": best_score,
+            "historical_facts_used": entry["historical_facts_used"]
+        }
+    
+    def store(
+        self, 
+        character_id: str, 
+        query: str, 
+        query_embedding: np.ndarray, 
+        response_text: str,
+        historical_facts_used: int = 0
+    ):
+        character_entries = self.entries.setdefault(character_id, OrderedDict())
+        key = self._normalize(query)
+        
+        character_entries[key] = {
+            "query": query,
+            "embedding": np.asarray(query_embedding, dtype=np.float32),
+            "response_text": response_text,
+            "historical_facts_used": historical_facts_used,
+            "created_at": time.time(),
+            "hits": 0
+        }
+        character_entries.move_to_end(key)
+        self.stats["stores"] += 1
+        
+        while len(character_entries) > self.max_entries_per_character:
+            character_entries.popitem(last=False)
+            self.stats["evictions"] += 1
+    
+    def clear(self, character_id: Optional[str] = None):
+        if character_id:
+            self.entries.pop(character_id, None)
+        else:
+            self.entries.clear()
+    
+    def get_stats(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": sum(len(entries) for entries in self.entries.values()),
+            "entries_by_character": {char_id: len(entries) for char_id, entries in self.entries.items()},
+            "similarity_threshold": self.similarity_threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries_per_character": self.max_entries_per_character
+        }
+    
+    def _evict_expired(self, character_entries: "OrderedDict[str, Dict]"):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [key for key, entry in character_entries.items() if entry["created_at"] < cutoff]
+        for key in expired:
+            del character_entries[key]
+            self.stats["evictions"] += 1
+    
+    def _normalize(self, text: str) -> str:
+        return " ".join(re.findall(r"[a-z0-9']+", text.lower()))
+
+_response_cache_instance: Optional[SemanticResponseCache] = None
+
+def get_response_cache() -> SemanticResponseCache:
+    global _response_cache_instance
+    if _response_cache_instance is None:
+        _response_cache_instance = SemanticResponseCache(
+            similarity_threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.9")),
+            ttl_seconds=int(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+            max_entries_per_character=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+        )
+    return _response_cache_instance
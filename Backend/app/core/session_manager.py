@@ -7,6 +7,10 @@ import logging
 logger = logging.getLogger(__name__)
 
 class ConversationSession:
+    
+    LANGUAGE_PIN_PROBABILITY = 0.8
+    LANGUAGE_PIN_AGREEMENT = 2
+    
     def __init__(self, character_id: str, session_id: Optional[str] = None):
         self.session_id = session_id or str(uuid.uuid4())
         self.character_id = character_id
@@ -14,6 +18,13 @@ class ConversationSession:
         self.created_at = datetime.now()
         self.last_activity = datetime.now()
         self.total_exchanges = 0
+        self.llm_context: Optional[List[int]] = None
+        self.llm_context_model: Optional[str] = None
+        self.llm_context_host: Optional[str] = None
+        self.llm_context_updated_at: Optional[datetime] = None
+        self.language: Optional[str] = None
+        self.language_candidate: Optional[str] = None
+        self.language_votes = 0
     
     def add_exchange(self, user_input: str, character_response: str):
         exchange = {
@@ -31,6 +42,64 @@ class ConversationSession:
     def get_recent_context(self, max_exchanges: int = 3) -> List[Dict]:
         return self.conversation_history[-max_exchanges:] if self.conversation_history else []
     
+    def set_llm_context(self, context: Optional[List[int]], model_name: str, host: Optional[str] = None):
+        if not context:
+            self.clear_llm_context()
+            return
+        self.llm_context = list(context)
+        self.llm_context_model = model_name
+        self.llm_context_host = host
+        self.llm_context_updated_at = datetime.now()
+    
+    def get_llm_context(self, model_name: str, ttl_seconds: int = 300) -> Optional[List[int]]:
+        if not self.llm_context:
+            return None
+        
+        if self.llm_context_model != model_name:
+            logger.info(f"🔄 Discarding LLM context for {self.session_id[:8]}...: model changed to {model_name}")
+            self.clear_llm_context()
+            return None
+        
+        if datetime.now() - self.llm_context_updated_at > timedelta(seconds=ttl_seconds):
+            logger.info(f"⌛ Discarding expired LLM context for {self.session_id[:8]}...")
+            self.clear_llm_context()
+            return None
+        
+        return self.llm_context
+    
+    def clear_llm_context(self):
+        self.llm_context = None
+        self.llm_context_model = None
+        self.llm_context_host = None
+        self.llm_context_updated_at = None
+    
+    def pin_language(self, language: Optional[str], probability: Optional[float] = None):
+        """Pins a detected language once it can be trusted: right away when the
+        detection probability reaches LANGUAGE_PIN_PROBABILITY, otherwise after
+        LANGUAGE_PIN_AGREEMENT turns in a row detect the same language."""
+        if self.language or not language or language == "unknown":
+            return
+        
+        if language == self.language_candidate:
+            self.language_votes += 1
+        else:
+            self.language_candidate = language
+            self.language_votes = 1
+        
+        if (probability or 0.0) < self.LANGUAGE_PIN_PROBABILITY and self.language_votes < self.LANGUAGE_PIN_AGREEMENT:
+            logger.info(f"🌐 Detected '{language}' for session {self.session_id[:8]}... (p={probability or 0.0:.2f}), not pinned yet")
+            return
+        
+        self.language = language
+        logger.info(f"🌐 Pinned language '{language}' for session {self.session_id[:8]}...")
+    
+    def set_language(self, language: Optional[str]):
+        """Pins a language chosen by the client, or with None unpins it so later turns detect it again."""
+        self.language = language
+        self.language_candidate = None
+        self.language_votes = 0
+        logger.info(f"🌐 Language for session {self.session_id[:8]}... set to {language or 'auto-detect'}")
+    
     def get_session_duration(self) -> int:
         return int((datetime.now() - self.created_at).total_seconds())
     
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import re
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+def normalize_flight_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower()).rstrip(" .!?")
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key onto one in-flight task.
+
+    The shared task is shielded so a caller that disconnects (or hits its
+    deadline) does not cancel the work other callers are still waiting on.
+    Once the last waiter is gone the task is cancelled, so abandoned work
+    does not keep holding backend capacity.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.stats = {"leaders": 0, "coalesced": 0, "abandoned": 0}
+    
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        
+        if task is not None:
+            self.stats["coalesced"] += 1
+            logger.info(f"🔗 Coalesced {self.name} request onto in-flight work ({len(self._inflight)} in flight)")
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            self.stats["leaders"] += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._leave(key, task)
+    
+    def _leave(self, key: Hashable, task: asyncio.Task):
+        self._waiters[task] -= 1
+        if self._waiters[task]:
+            return
+        
+        del self._waiters[task]
+        if not task.done():
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+            task.cancel()
+            self.stats["abandoned"] += 1
+            logger.info(f"✂️ Cancelled {self.name} work abandoned by all waiters")
+    
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+    
+    def get_stats(self) -> Dict:
+        total = self.stats["leaders"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "in_flight": len(self._inflight),
+            "coalesced_ratio": round(self.stats["coalesced"] / total, 3) if total else 0.0
+        }
+
+_single_flight_instances: Dict[str, SingleFlight] = {}
+
+def get_single_flight(name: str) -> SingleFlight:
+    if name not in _single_flight_instances:
+        _single_flight_instances[name] = SingleFlight(name)
+    return _single_flight_instances[name]
+
+def get_single_flight_stats() -> Dict[str, Dict]:
+    return {name: flight.get_stats() for name, flight in _single_flight_instances.items()}
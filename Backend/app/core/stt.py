@@ -1,68 +1,488 @@
-import whisper
 import logging
-from typing import Optional
+import os
+import time
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
 import torch
-import librosa
 import numpy as np
-import io
+
+from .stt_engines import STTEngine, create_stt_engine
+from ..utils.audio_processing import TARGET_SAMPLE_RATE, decode_audio, find_speech
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+AudioInput = Union[bytes, str, np.ndarray]
+
+class STTOverloadedError(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _decode_audio(audio_data: Union[bytes, str]) -> np.ndarray:
+    start_time = time.time()
+    audio_array, decode_path = decode_audio(audio_data)
+
+    logger.info(f"🔄 Loaded audio: {len(audio_array)} samples at 16000Hz via {decode_path} in {(time.time() - start_time) * 1000:.0f}ms")
+
+    return audio_array
+
+def _to_array(audio_data: AudioInput) -> np.ndarray:
+    if isinstance(audio_data, np.ndarray):
+        return audio_data.astype(np.float32, copy=False)
+    return _decode_audio(audio_data)
+
+def _trim_silence(audio_array: np.ndarray, trim_options: Optional[dict]) -> Optional[np.ndarray]:
+    """Returns the speech span of the clip (a view, no copy), or None if it holds no speech."""
+    if trim_options is None:
+        return audio_array
+    speech = find_speech(audio_array, **trim_options)
+    if speech is None:
+        return None
+    start, end = speech
+    return audio_array[start:end]
+
+def _run_batch_transcription(
+    engine: STTEngine,
+    audio_items: List[AudioInput],
+    language: Optional[str] = None,
+    initial_prompt: Optional[str] = None,
+    trim_options: Optional[dict] = None
+) -> List[dict]:
+    """Decodes, trims and transcribes a batch.
+
+    Clips without speech are answered without calling the engine. Each result
+    is tagged with its original and trimmed duration and its share of the
+    engine time for real-time factor tracking.
+    """
+    arrays = [_to_array(item) for item in audio_items]
+    trimmed = [_trim_silence(array, trim_options) for array in arrays]
+    speech_indices = [index for index, array in enumerate(trimmed) if array is not None]
+
+    results: List[dict] = [
+        {"transcript": "", "language": language or "unknown", "language_probability": None, "no_speech": True}
+        for _ in arrays
+    ]
+
+    processing_s = 0.0
+    if speech_indices:
+        start_time = time.perf_counter()
+        engine_results = engine.transcribe_batch([trimmed[index] for index in speech_indices], language, initial_prompt)
+        processing_s = time.perf_counter() - start_time
+        for index, result in zip(speech_indices, engine_results):
+            results[index] = {**result, "no_speech": False}
+
+    skipped = len(arrays) - len(speech_indices)
+    if skipped:
+        logger.info(f"🔇 Skipped {skipped} clip(s) without speech")
+
+    speech_total = sum(len(trimmed[index]) for index in speech_indices) or 1
+    for index, result in enumerate(results):
+        speech_samples = len(trimmed[index]) if trimmed[index] is not None else 0
+        result["audio_duration_s"] = len(arrays[index]) / TARGET_SAMPLE_RATE
+        result["trimmed_duration_s"] = speech_samples / TARGET_SAMPLE_RATE
+        result["processing_s"] = processing_s * speech_samples / speech_total
+
+    return results
+
+def _finish_job(job: asyncio.Future, on_done: Optional[Callable[[], None]]):
+    if not job.cancelled():
+        job.exception()
+    if on_done is not None:
+        on_done()
+
+_worker_engine: Optional[STTEngine] = None
+
+def _init_worker(engine: str, model_size: str, device: str, compute_type: Optional[str], torch_threads: int, decode_options: dict):
+    global _worker_engine
+    torch.set_num_threads(torch_threads)
+    _worker_engine = create_stt_engine(engine, model_size, device, compute_type=compute_type, cpu_threads=torch_threads, **decode_options)
+    _worker_engine.load()
+    logger.info(f"👷 STT worker {os.getpid()} loaded {engine} {model_size} ({_worker_engine.compute_type}) with {torch_threads} threads")
+
+def _transcribe_in_worker(
+    audio_items: List[AudioInput],
+    language: Optional[str] = None,
+    initial_prompt: Optional[str] = None,
+    trim_options: Optional[dict] = None
+) -> List[dict]:
+    return _run_batch_transcription(_worker_engine, audio_items, language, initial_prompt, trim_options)
+
+def _warm_up_worker() -> int:
+    _worker_engine.warm_up()
+    return os.getpid()
+
+class STTWorkerPool:
+    """Runs the STT engine in separate processes, each with its own preloaded model.
+
+    At most num_workers + max_queue transcriptions are accepted at once;
+    anything beyond that is rejected with STTOverloadedError.
+    """
+
+    def __init__(
+        self,
+        engine: str,
+        model_size: str,
+        device: str,
+        compute_type: Optional[str] = None,
+        decode_options: Optional[dict] = None,
+        num_workers: int = 2,
+        torch_threads: int = 1,
+        max_queue: int = 8,
+        timeout: float = 60.0
+    ):
+        self.engine = engine
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.decode_options = decode_options or {}
+        self.num_workers = num_workers
+        self.torch_threads = torch_threads
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pending = 0
+        self._avg_job_s = 2.0
+        self.stats = {"completed": 0, "failed": 0, "timed_out": 0, "rejected": 0, "restarts": 0}
+        self.executor = self._create_executor()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.engine, self.model_size, self.device, self.compute_type, self.torch_threads, self.decode_options)
+        )
+
+    def estimate_retry_after(self) -> int:
+        return max(1, round(self._pending / self.num_workers * self._avg_job_s))
+
+    def check_admission(self, incoming: int = 1):
+        if self._pending + incoming > self.num_workers + self.max_queue:
+            self.stats["rejected"] += 1
+            raise STTOverloadedError(
+                f"{self._pending} transcriptions already pending",
+                self.estimate_retry_after()
+            )
+
+    async def transcribe(
+        self,
+        audio_items: List[AudioInput],
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None,
+        trim_options: Optional[dict] = None,
+        on_done: Optional[Callable[[], None]] = None
+    ) -> List[dict]:
+        """Runs one job in a worker. on_done is called once the job has finished
+        or been cancelled, even when this call already gave up on it."""
+        loop = asyncio.get_running_loop()
+        start_time = time.time()
+        count = len(audio_items)
+        self._pending += count
+
+        try:
+            future = self.executor.submit(_transcribe_in_worker, audio_items, language, initial_prompt, trim_options)
+        except BrokenProcessPool:
+            self._release(count, on_done)
+            self._restart()
+            raise
+
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, count, on_done))
+
+        try:
+            results = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += count
+            raise
+        except BrokenProcessPool:
+            self.stats["failed"] += count
+            self._restart()
+            raise
+        except Exception:
+            self.stats["failed"] += count
+            raise
+
+        elapsed = time.time() - start_time
+        self._avg_job_s = 0.8 * self._avg_job_s + 0.2 * elapsed / count
+        self.stats["completed"] += count
+        return results
+
+    def _release(self, count: int, on_done: Optional[Callable[[], None]] = None):
+        self._pending -= count
+        if on_done is not None:
+            on_done()
+
+    def _restart(self):
+        logger.error("💥 STT worker pool broke, restarting workers")
+        self.stats["restarts"] += 1
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = self._create_executor()
+
+    def warm_up(self):
+        futures = [self.executor.submit(_warm_up_worker) for _ in range(self.num_workers)]
+        pids = {future.result() for future in futures}
+        logger.info(f"🔥 {len(pids)} STT worker process(es) warmed up")
+
+    def get_info(self) -> dict:
+        return {
+            "num_workers": self.num_workers,
+            "torch_threads_per_worker": self.torch_threads,
+            "max_queue": self.max_queue,
+            "timeout_s": self.timeout,
+            "pending": self._pending,
+            "avg_job_s": round(self._avg_job_s, 2),
+            **self.stats
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class STTBatcher:
+    """Collects transcription requests for up to window_ms and runs them as one batch.
+
+    Requests are grouped by language and initial prompt so each batch shares
+    decoding options; a group is flushed early once it reaches max_batch.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[AudioInput], Optional[str], Optional[str], Optional[Callable[[], None]]], Awaitable[List[dict]]],
+        window_ms: float = 25.0,
+        max_batch: int = 8
+    ):
+        self.run_batch = run_batch
+        self.window_s = window_ms / 1000
+        self.max_batch = max_batch
+        self._groups: Dict[Tuple[Optional[str], Optional[str]], List[Tuple[AudioInput, asyncio.Future, Optional[Callable[[], None]]]]] = {}
+        self._timers: Dict[Tuple[Optional[str], Optional[str]], asyncio.TimerHandle] = {}
+        self._tasks = set()
+        self.stats = {"batches": 0, "requests": 0, "max_batch_seen": 0}
+
+    @property
+    def queued(self) -> int:
+        return sum(len(group) for group in self._groups.values())
+
+    async def submit(
+        self,
+        audio_data: AudioInput,
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None,
+        on_release: Optional[Callable[[], None]] = None
+    ) -> dict:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (language, initial_prompt)
+        group = self._groups.setdefault(key, [])
+        group.append((audio_data, future, on_release))
+
+        if len(group) >= self.max_batch:
+            self._flush(key)
+        elif len(group) == 1:
+            self._timers[key] = loop.call_later(self.window_s, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: Tuple[Optional[str], Optional[str]]):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        items = self._groups.pop(key, [])
+        if items:
+            task = asyncio.create_task(self._run(items, *key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self,
+        items: List[Tuple[AudioInput, asyncio.Future, Optional[Callable[[], None]]]],
+        language: Optional[str],
+        initial_prompt: Optional[str]
+    ):
+        self.stats["batches"] += 1
+        self.stats["requests"] += len(items)
+        self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(items))
+
+        def release_all():
+            for _, _, on_release in items:
+                if on_release is not None:
+                    on_release()
+
+        try:
+            results = await self.run_batch([audio for audio, _, _ in items], language, initial_prompt, release_all)
+        except Exception as e:
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_info(self) -> dict:
+        batches = self.stats["batches"]
+        return {
+            "window_ms": round(self.window_s * 1000, 1),
+            "max_batch": self.max_batch,
+            "queued": self.queued,
+            "batches": batches,
+            "avg_batch_size": round(self.stats["requests"] / batches, 2) if batches else 0,
+            "max_batch_seen": self.stats["max_batch_seen"]
+        }
+
 class WhisperSTT:
-    def __init__(self, model_size: str = "base"):
+    def __init__(
+        self,
+        model_size: str = "base",
+        engine: str = "openai-whisper",
+        compute_type: Optional[str] = None,
+        beam_size: int = 1,
+        condition_on_previous_text: bool = False,
+        temperature_fallback: bool = False,
+        num_workers: int = 0,
+        torch_threads: Optional[int] = None,
+        max_queue: int = 8,
+        timeout: float = 60.0,
+        batch_window_ms: float = 25.0,
+        max_batch: int = 8,
+        trim_silence: bool = True,
+        vad_threshold: float = 0.002,
+        vad_margin_db: float = 10.0,
+        trim_padding_ms: int = 200
+    ):
         self.model_size = model_size
-        self.model = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"🎤 Initializing Whisper STT with model: {model_size} on device: {self.device}")
-        self._load_model()
+        self.engine = create_stt_engine(
+            engine,
+            model_size,
+            self.device,
+            compute_type=compute_type,
+            beam_size=beam_size,
+            condition_on_previous_text=condition_on_previous_text,
+            temperature_fallback=temperature_fallback
+        )
+        self.worker_pool = None
+        self.batcher = None
+        self.timeout = timeout
+        self._model_lock = threading.Lock()
+        self._audio_s = 0.0
+        self._trimmed_s = 0.0
+        self._processing_s = 0.0
+        self.no_speech_rejected = 0
+        self.trim_options = {"threshold": vad_threshold, "margin_db": vad_margin_db, "padding_ms": trim_padding_ms} if trim_silence else None
+        logger.info(f"🎤 Initializing {engine} STT with model: {model_size} ({self.engine.compute_type}) on device: {self.device}")
+
+        if num_workers > 0:
+            self.worker_pool = STTWorkerPool(
+                engine=engine,
+                model_size=model_size,
+                device=self.device,
+                compute_type=self.engine.compute_type,
+                decode_options=self.engine.get_decode_options(),
+                num_workers=num_workers,
+                torch_threads=torch_threads or max(1, (os.cpu_count() or 1) // num_workers),
+                max_queue=max_queue,
+                timeout=timeout
+            )
+            logger.info(f"👷 {engine} will run in {num_workers} worker process(es)")
+        else:
+            self.engine.cpu_threads = torch_threads or 0
+            self._load_model()
+
+        if max_batch > 1:
+            self.batcher = STTBatcher(self._transcribe_batch, window_ms=batch_window_ms, max_batch=max_batch)
+            logger.info(f"📦 Batching up to {max_batch} transcriptions per {batch_window_ms:g}ms window")
+
+    @property
+    def model(self):
+        return self.engine.model
 
     def _load_model(self):
         try:
-            logger.info(f"📥 Loading Whisper model: {self.model_size}")
-            self.model = whisper.load_model(self.model_size, device=self.device)
-            logger.info("✅ Whisper model loaded successfully!")
+            logger.info(f"📥 Loading {self.engine.name} model: {self.model_size}")
+            self.engine.load()
+            logger.info("✅ STT model loaded successfully!")
         except Exception as e:
-            logger.error(f"❌ Failed to load Whisper model: {e}")
-            raise Exception(f"Could not initialize Whisper: {e}")
+            logger.error(f"❌ Failed to load {self.engine.name} model: {e}")
+            raise Exception(f"Could not initialize {self.engine.name}: {e}")
 
-    async def transcribe_audio(self, audio_data: bytes, language: str = None) -> dict:
+    def warm_up(self):
+        if self.worker_pool is not None:
+            self.worker_pool.warm_up()
+            return
         if not self.model:
             raise Exception("Whisper model not loaded!")
-        
+        self.engine.warm_up()
+        logger.info(f"🔥 {self.engine.name} model warmed up")
+
+    async def transcribe_audio(
+        self,
+        audio_data: AudioInput,
+        language: str = None,
+        initial_prompt: Optional[str] = None,
+        on_release: Optional[Callable[[], None]] = None
+    ) -> dict:
+        """on_release is called once nothing reads audio_data any more: when the
+        job finishes or is cancelled, which can be after a timeout was returned."""
+        if not self.model and self.worker_pool is None:
+            if on_release is not None:
+                on_release()
+            raise Exception("Whisper model not loaded!")
+
         try:
-            logger.info(f"🎵 Processing {len(audio_data)} bytes of audio data in memory")
-            
-            audio_array, sample_rate = librosa.load(
-                io.BytesIO(audio_data), 
-                sr=16000
-            )
-            
-            logger.info(f"🔄 Loaded audio: {len(audio_array)} samples at {sample_rate}Hz")
-            
-            if len(audio_array.shape) > 1:
-                audio_array = librosa.to_mono(audio_array)
-            
-            audio_array = audio_array.astype(np.float32)
-            
-            logger.info(f"🎯 Transcribing audio array directly...")
-            
-            if language:
-                result = self.model.transcribe(audio_array, language=language)
+            if isinstance(audio_data, np.ndarray):
+                logger.info(f"🎵 Processing {len(audio_data)} samples of streamed audio")
+            elif isinstance(audio_data, str):
+                logger.info(f"🎵 Processing spooled audio file {audio_data}")
+            else:
+                logger.info(f"🎵 Processing {len(audio_data)} bytes of audio data")
+
+            if self.worker_pool is not None:
+                try:
+                    self.worker_pool.check_admission(1 + (self.batcher.queued if self.batcher else 0))
+                except STTOverloadedError:
+                    if on_release is not None:
+                        on_release()
+                    raise
+
+            if self.batcher is not None:
+                result = await self.batcher.submit(audio_data, language, initial_prompt, on_release)
             else:
-                result = self.model.transcribe(audio_array)
-            
-            transcript = result["text"].strip()
-            language_detected = result.get("language", "unknown")
-            
-            logger.info(f"✅ Transcription successful: '{transcript}' (Language: {language_detected})")
-            
+                result = (await self._transcribe_batch([audio_data], language, initial_prompt, on_release))[0]
+
+            transcript = result["transcript"]
+            language_detected = result["language"]
+
+            if result["no_speech"]:
+                logger.info(f"🔇 No speech in {result['audio_duration_s']:.1f}s clip, skipped transcription")
+            else:
+                logger.info(f"✅ Transcription successful: '{transcript}' (Language: {language_detected}, {result['trimmed_duration_s']:.1f}s of {result['audio_duration_s']:.1f}s after trimming)")
+
             return {
                 "transcript": transcript,
                 "language": language_detected,
-                "success": True
+                "language_probability": result.get("language_probability"),
+                "success": True,
+                "no_speech": result["no_speech"],
+                "audio_duration_s": round(result["audio_duration_s"], 2),
+                "trimmed_duration_s": round(result["trimmed_duration_s"], 2)
+            }
+
+        except STTOverloadedError:
+            raise
+        except asyncio.TimeoutError:
+            logger.error(f"⏰ Transcription timed out after {self.timeout:g}s")
+            return {
+                "transcript": "",
+                "language": "unknown",
+                "success": False,
+                "timed_out": True,
+                "error": f"Transcription timed out after {self.timeout:g}s"
             }
-            
         except Exception as e:
             logger.error(f"❌ Transcription failed: {e}")
             return {
@@ -72,19 +492,97 @@ class WhisperSTT:
                 "error": str(e)
             }
 
+    async def _transcribe_batch(
+        self,
+        audio_items: List[AudioInput],
+        language: Optional[str],
+        initial_prompt: Optional[str] = None,
+        on_done: Optional[Callable[[], None]] = None
+    ) -> List[dict]:
+        if self.worker_pool is not None:
+            results = await self.worker_pool.transcribe(audio_items, language, initial_prompt, self.trim_options, on_done)
+        else:
+            job = asyncio.ensure_future(asyncio.to_thread(self._transcribe_locked, audio_items, language, initial_prompt))
+            job.add_done_callback(lambda job: _finish_job(job, on_done))
+            results = await asyncio.wait_for(asyncio.shield(job), timeout=self.timeout)
+
+        for result in results:
+            self._audio_s += result["audio_duration_s"]
+            self._trimmed_s += result["trimmed_duration_s"]
+            self._processing_s += result["processing_s"]
+            self.no_speech_rejected += result["no_speech"]
+        return results
+
+    def _transcribe_locked(
+        self,
+        audio_items: List[AudioInput],
+        language: Optional[str],
+        initial_prompt: Optional[str] = None
+    ) -> List[dict]:
+        with self._model_lock:
+            return _run_batch_transcription(self.engine, audio_items, language, initial_prompt, self.trim_options)
+
     def get_model_info(self) -> dict:
         return {
+            "engine": self.engine.name,
             "model_size": self.model_size,
             "device": self.device,
-            "is_loaded": self.model is not None,
-            "processing_method": "in_memory",
+            "compute_type": self.engine.compute_type,
+            "decode_options": self.engine.get_decode_options(),
+            "is_loaded": self.model is not None or self.worker_pool is not None,
+            "real_time_factor": round(self._processing_s / self._audio_s, 3) if self._audio_s else None,
+            "audio_seconds_processed": round(self._audio_s, 1),
+            "silence_trimming": {
+                "enabled": self.trim_options is not None,
+                "threshold": self.trim_options["threshold"] if self.trim_options else None,
+                "margin_db": self.trim_options["margin_db"] if self.trim_options else None,
+                "seconds_trimmed": round(self._audio_s - self._trimmed_s, 1),
+                "no_speech_rejected": self.no_speech_rejected
+            },
+            "processing_method": "worker_pool" if self.worker_pool is not None else "in_memory",
+            "workers": self.worker_pool.get_info() if self.worker_pool is not None else None,
+            "batching": self.batcher.get_info() if self.batcher is not None else None,
             "supported_formats": ["wav", "mp3", "flac", "ogg", "m4a"]
         }
 
+    def shutdown(self):
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown()
+            logger.info("🔌 Shut down STT worker pool")
+
 _stt_instance: Optional[WhisperSTT] = None
+_stt_instance_lock = threading.Lock()
 
 def get_stt_service() -> WhisperSTT:
     global _stt_instance
-    if _stt_instance is None:
-        _stt_instance = WhisperSTT(model_size="base")
-    return _stt_instance
\ No newline at end of file
+    if _stt_instance is not None:
+        return _stt_instance
+    
+    with _stt_instance_lock:
+        if _stt_instance is None:
+            torch_threads = os.getenv("STT_TORCH_THREADS")
+            _stt_instance = WhisperSTT(
+                model_size=os.getenv("STT_MODEL", "base"),
+                engine=os.getenv("STT_ENGINE", "openai-whisper"),
+                compute_type=os.getenv("STT_COMPUTE_TYPE") or None,
+                beam_size=int(os.getenv("STT_BEAM_SIZE", "1")),
+                condition_on_previous_text=os.getenv("STT_CONDITION_ON_PREVIOUS_TEXT", "false").lower() == "true",
+                temperature_fallback=os.getenv("STT_TEMPERATURE_FALLBACK", "false").lower() == "true",
+                num_workers=int(os.getenv("STT_WORKERS", "2")),
+                torch_threads=int(torch_threads) if torch_threads else None,
+                max_queue=int(os.getenv("STT_MAX_QUEUE", "8")),
+                timeout=float(os.getenv("STT_TIMEOUT", "60")),
+                batch_window_ms=float(os.getenv("STT_BATCH_WINDOW_MS", "25")),
+                max_batch=int(os.getenv("STT_MAX_BATCH", "8")),
+                trim_silence=os.getenv("STT_TRIM_SILENCE", "true").lower() == "true",
+                vad_threshold=float(os.getenv("STT_VAD_THRESHOLD", "0.002")),
+                vad_margin_db=float(os.getenv("STT_VAD_MARGIN_DB", "10")),
+                trim_padding_ms=int(os.getenv("STT_TRIM_PADDING_MS", "200"))
+            )
+    return _stt_instance
+
+def shutdown_stt_service():
+    global _stt_instance
+    if _stt_instance is not None:
+        _stt_instance.shutdown()
+        _stt_instance = None
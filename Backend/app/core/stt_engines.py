@@ -0,0 +1,238 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Type
+
+import numpy as np
+import torch
+
+try:
+    import whisper
+except ImportError:
+    whisper = None
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+class STTEngine(ABC):
+    """A speech-to-text backend that turns 16 kHz mono float32 arrays into text.
+
+    Engines are loaded once per process (in-process or inside each worker) and
+    are not thread-safe; callers serialize access. beam_size 1 means greedy
+    decoding; with temperature_fallback off, a clip is decoded exactly once.
+    """
+
+    name = "base"
+
+    def __init__(
+        self,
+        model_size: str,
+        device: str,
+        compute_type: Optional[str] = None,
+        cpu_threads: int = 0,
+        beam_size: int = 1,
+        condition_on_previous_text: bool = False,
+        temperature_fallback: bool = False
+    ):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type or self.default_compute_type(device)
+        self.cpu_threads = cpu_threads
+        self.beam_size = beam_size
+        self.condition_on_previous_text = condition_on_previous_text
+        self.temperature = FALLBACK_TEMPERATURES if temperature_fallback else 0.0
+        self.model = None
+
+    @staticmethod
+    def default_compute_type(device: str) -> str:
+        return "float16" if device == "cuda" else "float32"
+
+    @abstractmethod
+    def load(self):
+        ...
+
+    def get_decode_options(self) -> dict:
+        return {
+            "beam_size": self.beam_size,
+            "condition_on_previous_text": self.condition_on_previous_text,
+            "temperature_fallback": self.temperature != 0.0
+        }
+
+    @abstractmethod
+    def transcribe(self, audio_array: np.ndarray, language: Optional[str] = None, initial_prompt: Optional[str] = None) -> dict:
+        """Returns transcript, language and language_probability (None when language was given)."""
+
+    def transcribe_batch(
+        self,
+        arrays: List[np.ndarray],
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None
+    ) -> List[dict]:
+        return [self.transcribe(array, language, initial_prompt) for array in arrays]
+
+    def warm_up(self):
+        self.transcribe(np.zeros(16000, dtype=np.float32), language="en")
+
+class OpenAIWhisperEngine(STTEngine):
+    """The reference openai-whisper (PyTorch) implementation, with batched decoding."""
+
+    name = "openai-whisper"
+
+    COMPRESSION_RATIO_THRESHOLD = 2.4
+    LOGPROB_THRESHOLD = -1.0
+    NO_SPEECH_THRESHOLD = 0.6
+
+    def load(self):
+        if whisper is None:
+            raise RuntimeError("The openai-whisper engine requires the openai-whisper package")
+        self.model = whisper.load_model(self.model_size, device=self.device)
+
+    def transcribe(self, audio_array: np.ndarray, language: Optional[str] = None, initial_prompt: Optional[str] = None) -> dict:
+        language_probability = None
+        if language is None:
+            language, language_probability = self._detect_language(audio_array)
+
+        result = self.model.transcribe(
+            audio_array,
+            language=language,
+            initial_prompt=initial_prompt,
+            temperature=self.temperature,
+            condition_on_previous_text=self.condition_on_previous_text,
+            beam_size=self.beam_size if self.beam_size > 1 else None,
+            fp16=self.compute_type == "float16"
+        )
+
+        return {
+            "transcript": result["text"].strip(),
+            "language": result.get("language", "unknown"),
+            "language_probability": language_probability
+        }
+
+    def _detect_language(self, audio_array: np.ndarray):
+        """Detects the language on the first 30 s, as transcribe() would, but keeps its probability."""
+        if not self.model.is_multilingual:
+            return "en", 1.0
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio_array)), self.model.dims.n_mels)
+        mel = mel.to(self.model.device, torch.float16 if self.compute_type == "float16" else torch.float32)
+        _, probs = self.model.detect_language(mel)
+        language = max(probs, key=probs.get)
+        return language, float(probs[language])
+
+    def transcribe_batch(
+        self,
+        arrays: List[np.ndarray],
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None
+    ) -> List[dict]:
+        """Transcribes several clips with one batched encoder/decoder pass.
+
+        Clips longer than Whisper's 30 s window (and single-clip batches) use the
+        regular transcribe loop instead. The batched pass decodes once at
+        temperature 0; with temperature_fallback on, clips that fail
+        transcribe()'s compression ratio or logprob checks are decoded again
+        through transcribe(), which retries at higher temperatures.
+        """
+        results: List[Optional[dict]] = [None] * len(arrays)
+
+        batch_indices = [index for index, array in enumerate(arrays) if len(array) <= whisper.audio.N_SAMPLES]
+        if len(batch_indices) < 2:
+            batch_indices = []
+
+        for index, array in enumerate(arrays):
+            if index not in batch_indices:
+                results[index] = self.transcribe(array, language, initial_prompt)
+
+        if batch_indices:
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(arrays[index])), self.model.dims.n_mels)
+                for index in batch_indices
+            ]).to(self.model.device)
+            options = whisper.DecodingOptions(
+                language=language,
+                prompt=initial_prompt,
+                beam_size=self.beam_size if self.beam_size > 1 else None,
+                without_timestamps=True,
+                fp16=self.compute_type == "float16"
+            )
+            decoded = whisper.decode(self.model, mel, options)
+            retried = 0
+
+            for index, result in zip(batch_indices, decoded):
+                is_silence = result.no_speech_prob > self.NO_SPEECH_THRESHOLD and result.avg_logprob < self.LOGPROB_THRESHOLD
+                needs_fallback = (
+                    result.compression_ratio > self.COMPRESSION_RATIO_THRESHOLD
+                    or result.avg_logprob < self.LOGPROB_THRESHOLD
+                )
+                if self.temperature != 0.0 and needs_fallback and not is_silence:
+                    results[index] = self.transcribe(arrays[index], language, initial_prompt)
+                    retried += 1
+                    continue
+
+                results[index] = {
+                    "transcript": "" if is_silence else result.text.strip(),
+                    "language": result.language or "unknown",
+                    "language_probability": result.language_probs.get(result.language) if result.language_probs else None
+                }
+
+            logger.info(f"📦 Batched Whisper pass over {len(batch_indices)} clips ({retried} decoded again with temperature fallback)")
+
+        return results
+
+class FasterWhisperEngine(STTEngine):
+    """CTranslate2 Whisper via faster-whisper; int8 weights on CPU by default."""
+
+    name = "faster-whisper"
+
+    @staticmethod
+    def default_compute_type(device: str) -> str:
+        return "float16" if device == "cuda" else "int8"
+
+    def load(self):
+        if WhisperModel is None:
+            raise RuntimeError("The faster-whisper engine requires the faster-whisper package")
+        self.model = WhisperModel(
+            self.model_size,
+            device=self.device,
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads
+        )
+
+    def transcribe(self, audio_array: np.ndarray, language: Optional[str] = None, initial_prompt: Optional[str] = None) -> dict:
+        segments, info = self.model.transcribe(
+            audio_array,
+            language=language,
+            initial_prompt=initial_prompt,
+            beam_size=self.beam_size,
+            temperature=self.temperature,
+            condition_on_previous_text=self.condition_on_previous_text
+        )
+        transcript = "".join(segment.text for segment in segments)
+
+        return {
+            "transcript": transcript.strip(),
+            "language": info.language or "unknown",
+            "language_probability": info.language_probability if language is None else None
+        }
+
+STT_ENGINES: Dict[str, Type[STTEngine]] = {
+    OpenAIWhisperEngine.name: OpenAIWhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine
+}
+
+def create_stt_engine(
+    engine: str,
+    model_size: str,
+    device: str,
+    compute_type: Optional[str] = None,
+    cpu_threads: int = 0,
+    **decode_options
+) -> STTEngine:
+    engine_class = STT_ENGINES.get(engine)
+    if engine_class is None:
+        raise ValueError(f"Unknown STT engine: {engine}. Available: {list(STT_ENGINES.keys())}")
+    return engine_class(model_size, device, compute_type=compute_type, cpu_threads=cpu_threads, **decode_options)
@@ -1,20 +1,165 @@
-import requests
 import os
 import logging
 import time
-from typing import Dict, Optional
+import asyncio
+import re
+from typing import AsyncIterator, Dict, List, Optional
 from datetime import datetime
 import json
 import tempfile
+import threading
+
+from .single_flight import get_single_flight
+from .tts_cache import TTSAudioCache
+from .tts_health import ProviderCircuitBreaker
+from .tts_http import ProviderHTTPClient
 
 logger = logging.getLogger(__name__)
 
+class SentenceSplitter:
+    
+    SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])["\')\]]*\s+')
+    
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._buffer = ""
+    
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        sentences = []
+        start = 0
+        
+        for match in self.SENTENCE_BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        
+        self._buffer = self._buffer[start:]
+        return sentences
+    
+    def flush(self) -> List[str]:
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return [remainder] if remainder else []
+
+class SpeechPipeline:
+    
+    def __init__(
+        self, 
+        tts_service: "WorkingFreeTTSService", 
+        character_id: str, 
+        session_id: Optional[str] = None,
+        min_sentence_chars: int = 20,
+        max_concurrency: int = 2
+    ):
+        self.tts_service = tts_service
+        self.character_id = character_id
+        self.session_id = session_id
+        self.splitter = SentenceSplitter(min_chars=min_sentence_chars)
+        self.segments: List[Dict] = []
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: List[asyncio.Task] = []
+        self._next_index = 0
+    
+    def feed(self, text: str):
+        for sentence in self.splitter.feed(text):
+            self._start(sentence)
+    
+    def close(self):
+        for sentence in self.splitter.flush():
+            self._start(sentence)
+    
+    def ready(self) -> List[Dict]:
+        completed = []
+        while self._next_index < len(self._tasks) and self._tasks[self._next_index].done():
+            completed.append(self._collect(self._tasks[self._next_index]))
+        return completed
+    
+    async def drain(self) -> AsyncIterator[Dict]:
+        while self._next_index < len(self._tasks):
+            task = self._tasks[self._next_index]
+            await asyncio.wait([task])
+            yield self._collect(task)
+    
+    def cancel(self):
+        for task in self._tasks[self._next_index:]:
+            task.cancel()
+    
+    def _start(self, sentence: str):
+        segment_index = len(self._tasks)
+        logger.info(f"🧩 Queuing TTS segment {segment_index} for {self.character_id}: '{sentence[:40]}...'")
+        self._tasks.append(asyncio.create_task(self._synthesize(segment_index, sentence)))
+    
+    async def _synthesize(self, segment_index: int, sentence: str) -> Dict:
+        async with self._semaphore:
+            result = await self.tts_service.generate_character_speech(
+                character_id=self.character_id,
+                text=sentence,
+                session_id=self.session_id
+            )
+        result["segment_index"] = segment_index
+        result["text"] = sentence
+        return result
+    
+    def _collect(self, task: asyncio.Task) -> Dict:
+        self._next_index += 1
+        try:
+            result = task.result()
+        except Exception as e:
+            result = {"success": False, "error": f"TTS segment error: {e}", "character_id": self.character_id}
+        self.segments.append(result)
+        return result
+
 class WorkingFreeTTSService:
     
-    def __init__(self):
+    PROVIDER_STRATEGIES = ("sequential", "hedged", "parallel")
+    LOCAL_PROVIDERS = ("espeak",)
+    
+    def __init__(
+        self,
+        http_settings: Optional[Dict[str, Dict]] = None,
+        espeak_timeout: float = 10.0,
+        cache_enabled: bool = True,
+        cache_max_entries: int = 2000,
+        provider_strategy: str = "hedged",
+        hedge_delay: float = 1.5,
+        breaker_settings: Optional[Dict] = None,
+        greeting_retry_seconds: float = 60.0
+    ):
+        if provider_strategy not in self.PROVIDER_STRATEGIES:
+            raise ValueError(f"Unknown TTS provider strategy: {provider_strategy}. Available: {list(self.PROVIDER_STRATEGIES)}")
+        
         self.output_dir = "generated_audio"
         self.character_voices = self._load_character_voice_settings()
         self._ensure_output_directory()
+        http_settings = http_settings or {}
+        self.http_clients = {
+            provider: ProviderHTTPClient(provider, **http_settings.get(provider, {}))
+            for provider in ("streamelements", "voicerss")
+        }
+        self.espeak_timeout = espeak_timeout
+        self.providers = {
+            "streamelements": self._try_streamelements_tts,
+            "voicerss": self._try_voicerss_tts,
+            "espeak": self._try_espeak_tts
+        }
+        self.breakers = {
+            provider: ProviderCircuitBreaker(provider, **(breaker_settings or {}))
+            for provider in self.providers
+        }
+        self.audio_cache = TTSAudioCache(
+            os.path.join(self.output_dir, "cache"),
+            url_prefix="/audio/cache",
+            max_entries=cache_max_entries
+        ) if cache_enabled else None
+        self.provider_strategy = provider_strategy
+        self.hedge_delay = hedge_delay
+        self.race_stats = {"races": 0, "hedges_launched": 0, "cancelled": 0, "wins": {}}
+        self.greeting_status: Dict[str, Dict] = {}
+        self.greeting_retry_seconds = greeting_retry_seconds
+        self.greeting_retry_at: Dict[str, float] = {}
+        self.greeting_upgrades: Dict[str, asyncio.Task] = {}
         logger.info("🎤 Working Free TTS Service initialized")
     
     def _ensure_output_directory(self):
@@ -92,29 +237,45 @@ class WorkingFreeTTSService:
             text = text[:497] + "..."
             logger.warning(f"⚠️ Text truncated to 500 characters for {character_id}")
         
+        if self.audio_cache is not None:
+            cached = self.audio_cache.lookup(character_id, self.character_voices[character_id], self.providers, text)
+            if cached is not None:
+                logger.info(f"🗄️ Serving cached speech for {character_id} from {cached['provider']}")
+                return {
+                    "success": True,
+                    **cached,
+                    "character_id": character_id,
+                    "cached": True,
+                    "generation_time_ms": 0,
+                    "voice_style": self.character_voices[character_id]["style"]
+                }
+        
+        flight_key = (character_id, " ".join(text.split()))
+        result = await get_single_flight("tts").run(
+            flight_key, lambda: self._synthesize_speech(character_id, text, session_id)
+        )
+        return dict(result)
+    
+    async def _synthesize_speech(
+        self, 
+        character_id: str, 
+        text: str, 
+        session_id: Optional[str]
+    ) -> Dict[str, str]:
         voice_config = self.character_voices[character_id]
         start_time = time.time()
         
-        tts_services = [
-            self._try_streamelements_tts,
-            self._try_voicerss_tts,
-            self._try_espeak_tts
-        ]
+        provider, result = await self._race_providers(character_id, text, voice_config, session_id)
         
-        for i, tts_service in enumerate(tts_services, 1):
-            logger.info(f"🎭 Trying TTS service {i} for {character_id}")
+        if result is not None:
+            generation_time = int((time.time() - start_time) * 1000)
+            result["generation_time_ms"] = generation_time
+            result["voice_style"] = voice_config["style"]
+            result["cached"] = False
+            await self._cache_audio(result, character_id, voice_config, provider, text)
             
-            result = await tts_service(character_id, text, voice_config, session_id)
-            
-            if result["success"]:
-                generation_time = int((time.time() - start_time) * 1000)
-                result["generation_time_ms"] = generation_time
-                result["voice_style"] = voice_config["style"]
-                
-                logger.info(f"✅ Generated speech for {character_id} in {generation_time}ms using service {i}")
-                return result
-            else:
-                logger.warning(f"⚠️ TTS service {i} failed: {result.get('error')}")
+            logger.info(f"✅ Generated speech for {character_id} in {generation_time}ms using {provider}")
+            return result
         
         generation_time = int((time.time() - start_time) * 1000)
         return {
@@ -124,15 +285,273 @@ class WorkingFreeTTSService:
             "generation_time_ms": generation_time
         }
     
+    async def _race_providers(
+        self, 
+        character_id: str, 
+        text: str, 
+        voice_config: Dict, 
+        session_id: Optional[str],
+        providers: Optional[List[str]] = None
+    ):
+        """Runs providers in health order and returns (provider, result) for the
+        first valid audio, or (None, None) if every provider failed.
+        
+        `providers` restricts the race to a subset of the configured providers.
+        
+        The next provider starts when the running ones have all failed or, unless
+        the strategy is sequential, once hedge_delay has passed without a result
+        ("parallel" starts them all at once). Providers still running when one
+        wins are cancelled. Providers with an open circuit are skipped unless
+        every circuit is open.
+        """
+        if self.provider_strategy == "sequential":
+            hedge_delay = None
+        elif self.provider_strategy == "parallel":
+            hedge_delay = 0.0
+        else:
+            hedge_delay = self.hedge_delay
+        
+        queue = [provider for provider in self.provider_order() if providers is None or provider in providers]
+        forced = not any(self.breakers[provider].available() for provider in queue)
+        if forced:
+            logger.warning(f"⚠️ All TTS provider circuits are open, trying every provider for {character_id}")
+        
+        running: Dict[asyncio.Task, str] = {}
+        started_at: Dict[asyncio.Task, float] = {}
+        winner = None
+        self.race_stats["races"] += 1
+        
+        def launch(reason: str) -> bool:
+            while queue:
+                provider = queue.pop(0)
+                if not self.breakers[provider].acquire() and not forced:
+                    logger.info(f"🔌 Skipping TTS provider {provider}, circuit {self.breakers[provider].state}")
+                    continue
+                if running:
+                    self.race_stats["hedges_launched"] += 1
+                logger.info(f"🎭 Starting TTS provider {provider} for {character_id} ({reason})")
+                task = asyncio.create_task(self.providers[provider](character_id, text, voice_config, session_id))
+                running[task] = provider
+                started_at[task] = time.perf_counter()
+                return True
+            return False
+        
+        try:
+            while queue or running:
+                if queue and (not running or hedge_delay == 0.0):
+                    launch("parallel" if running else "fallback" if started_at else "preferred")
+                    if not running:
+                        break
+                    continue
+                
+                done, _ = await asyncio.wait(
+                    running,
+                    timeout=hedge_delay if queue else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    launch(f"hedge after {hedge_delay:g}s")
+                    continue
+                
+                for task in done:
+                    provider = running.pop(task)
+                    result = task.result()
+                    latency = time.perf_counter() - started_at[task]
+                    if not result["success"]:
+                        self.breakers[provider].record_failure(latency)
+                        logger.warning(f"⚠️ TTS provider {provider} failed: {result.get('error')}")
+                    else:
+                        self.breakers[provider].record_success(latency)
+                        if winner is None:
+                            winner = (provider, result)
+                        else:
+                            self._discard_audio(result)
+                
+                if winner is not None:
+                    self.race_stats["wins"][winner[0]] = self.race_stats["wins"].get(winner[0], 0) + 1
+                    return winner
+        finally:
+            for task in running:
+                task.cancel()
+                self.breakers[running[task]].release()
+            self.race_stats["cancelled"] += len(running)
+            for outcome in await asyncio.gather(*running, return_exceptions=True):
+                if isinstance(outcome, dict) and outcome.get("success"):
+                    self._discard_audio(outcome)
+        
+        return None, None
+    
+    def provider_order(self) -> List[str]:
+        """Providers by health: a half-open provider due for its probe first, then
+        closed circuits, then the rest; within a group, higher rolling success
+        rate (in 10% steps) first, and the configured preference breaks ties. A
+        provider without enough recent calls to have a success rate keeps its
+        preferred place."""
+        def group(breaker: ProviderCircuitBreaker) -> int:
+            state = breaker.state
+            if state == ProviderCircuitBreaker.HALF_OPEN and breaker.available():
+                return 0
+            return 1 if state == ProviderCircuitBreaker.CLOSED else 2
+        
+        def health_key(item):
+            preference, provider = item
+            breaker = self.breakers[provider]
+            success_rate = breaker.success_rate
+            return (
+                group(breaker),
+                -round(success_rate if success_rate is not None else 1.0, 1),
+                preference
+            )
+        
+        return [provider for _, provider in sorted(enumerate(self.providers), key=health_key)]
+    
+    @staticmethod
+    def _discard_audio(result: Dict):
+        try:
+            os.remove(result["audio_path"])
+        except OSError:
+            pass
+    
+    async def _cache_audio(self, result: Dict, character_id: str, voice_config: Dict, provider: str, text: str):
+        if self.audio_cache is None:
+            return
+        
+        try:
+            cached = await asyncio.to_thread(
+                self.audio_cache.store, character_id, voice_config, provider, text, result["audio_path"]
+            )
+        except OSError as e:
+            logger.warning(f"⚠️ Could not cache {provider} audio for {character_id}: {e}")
+            return
+        
+        result.update(
+            cache_key=cached["cache_key"],
+            audio_url=cached["audio_url"],
+            audio_path=cached["audio_path"],
+            file_size=cached["file_size"]
+        )
+    
+    async def get_greeting_speech(self, character_id: str, text: str, session_id: Optional[str] = None) -> Dict:
+        """Speech for a character's greeting, pinned in the audio cache.
+        
+        Once rendered, this is a cache lookup; it synthesizes again only when the
+        greeting text or the character's voice settings change. A clip from a
+        local fallback provider is served but not pinned: the online providers
+        are retried in the background, at most every greeting_retry_seconds,
+        and their clip takes over the pin once one of them succeeds.
+        """
+        result = await self.generate_character_speech(character_id, text, session_id)
+        if result["success"] and self.audio_cache is not None and "cache_key" in result:
+            if not self._is_local_audio(character_id, text, result):
+                await self._pin_greeting(character_id, result["cache_key"])
+            else:
+                if not result["cached"]:
+                    self.greeting_retry_at[character_id] = time.time() + self.greeting_retry_seconds
+                self._schedule_greeting_upgrade(character_id, text)
+        return result
+    
+    def _is_local_audio(self, character_id: str, text: str, result: Dict) -> bool:
+        voice_config = self.character_voices[character_id]
+        return result.get("cache_key") in {
+            self.audio_cache.make_key(character_id, voice_config, provider, text)
+            for provider in self.LOCAL_PROVIDERS
+        }
+    
+    async def _pin_greeting(self, character_id: str, cache_key: str):
+        try:
+            await asyncio.to_thread(self.audio_cache.pin, cache_key, f"greeting:{character_id}")
+        except OSError as e:
+            logger.warning(f"⚠️ Could not pin greeting audio for {character_id}: {e}")
+    
+    def _schedule_greeting_upgrade(self, character_id: str, text: str):
+        if character_id in self.greeting_upgrades or time.time() < self.greeting_retry_at.get(character_id, 0.0):
+            return
+        
+        self.greeting_retry_at[character_id] = time.time() + self.greeting_retry_seconds
+        task = asyncio.create_task(self._upgrade_greeting(character_id, text))
+        self.greeting_upgrades[character_id] = task
+        task.add_done_callback(lambda _: self.greeting_upgrades.pop(character_id, None))
+    
+    async def _upgrade_greeting(self, character_id: str, text: str):
+        """Renders a greeting with the online providers to replace a local fallback clip."""
+        online = [provider for provider in self.providers if provider not in self.LOCAL_PROVIDERS]
+        if not any(self.breakers[provider].available() for provider in online):
+            return
+        
+        voice_config = self.character_voices[character_id]
+        provider, result = await self._race_providers(character_id, text, voice_config, None, providers=online)
+        if result is None:
+            logger.info(f"🔁 Greeting for {character_id} stays on local fallback audio until an online TTS provider recovers")
+            return
+        
+        await self._cache_audio(result, character_id, voice_config, provider, text)
+        if "cache_key" not in result:
+            self._discard_audio(result)
+            return
+        
+        await self._pin_greeting(character_id, result["cache_key"])
+        logger.info(f"👋 Replaced fallback greeting audio for {character_id} with {provider}")
+        if character_id in self.greeting_status:
+            self.greeting_status[character_id].update(
+                provider=result["provider"],
+                audio_url=result["audio_url"],
+                pinned=True
+            )
+    
+    async def prerender_greetings(self, greetings: Dict[str, str]):
+        """Renders and pins every character's greeting so the first turn of a session never waits on a provider."""
+        if self.audio_cache is None:
+            logger.info("⏭️ TTS audio cache disabled, skipping greeting pre-rendering")
+            return
+        
+        start_time = time.time()
+        
+        async def prerender(character_id: str, text: str):
+            try:
+                result = await self.get_greeting_speech(character_id, text)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            self.greeting_status[character_id] = {
+                "success": result["success"],
+                "rendered": result["success"] and not result.get("cached", False),
+                "provider": result.get("provider"),
+                "audio_url": result.get("audio_url"),
+                "pinned": result["success"] and "cache_key" in result and not self._is_local_audio(character_id, text, result),
+                "error": result.get("error")
+            }
+        
+        await asyncio.gather(*(
+            prerender(character_id, text)
+            for character_id, text in greetings.items()
+            if character_id in self.character_voices
+        ))
+        
+        rendered = sum(1 for status in self.greeting_status.values() if status["rendered"])
+        failed = [character_id for character_id, status in self.greeting_status.items() if not status["success"]]
+        logger.info(
+            f"👋 Greeting audio ready for {len(self.greeting_status) - len(failed)}/{len(self.greeting_status)} characters "
+            f"({rendered} rendered) in {time.time() - start_time:.1f}s"
+        )
+        if failed:
+            logger.warning(f"⚠️ Greeting pre-rendering failed for: {', '.join(failed)}")
+    
+    def start_speech_pipeline(
+        self, 
+        character_id: str, 
+        session_id: Optional[str] = None,
+        min_sentence_chars: int = 20,
+        max_concurrency: int = 2
+    ) -> SpeechPipeline:
+        return SpeechPipeline(self, character_id, session_id, min_sentence_chars, max_concurrency)
+    
     async def _try_streamelements_tts(self, character_id: str, text: str, voice_config: Dict, session_id: Optional[str]) -> Dict:
         try:
-            response = requests.get(
+            response = await self.http_clients["streamelements"].get(
                 "https://api.streamelements.com/kappa/v2/speech",
                 params={
                     "voice": voice_config["voice"],
                     "text": text
-                },
-                timeout=30
+                }
             )
             
             if response.status_code == 200 and len(response.content) > 1000:
@@ -145,7 +564,7 @@ class WorkingFreeTTSService:
     
     async def _try_voicerss_tts(self, character_id: str, text: str, voice_config: Dict, session_id: Optional[str]) -> Dict:
         try:
-            response = requests.get(
+            response = await self.http_clients["voicerss"].get(
                 "http://api.voicerss.org/",
                 params={
                     "key": "demo",
@@ -153,8 +572,7 @@ class WorkingFreeTTSService:
                     "src": text,
                     "f": "44khz_16bit_stereo",
                     "c": "mp3"
-                },
-                timeout=30
+                }
             )
             
             if response.status_code == 200 and len(response.content) > 1000:
@@ -167,8 +585,6 @@ class WorkingFreeTTSService:
     
     async def _try_espeak_tts(self, character_id: str, text: str, voice_config: Dict, session_id: Optional[str]) -> Dict:
         try:
-            import subprocess
-            
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
             session_part = f"_{session_id[:8]}" if session_id else ""
             audio_filename = f"{character_id}_{timestamp}_espeak{session_part}.wav"
@@ -181,9 +597,25 @@ class WorkingFreeTTSService:
                 text
             ]
             
-            result = subprocess.run(cmd, capture_output=True, timeout=30)
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(), timeout=self.espeak_timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return {"success": False, "error": f"espeak timed out after {self.espeak_timeout:g}s"}
+            except asyncio.CancelledError:
+                process.kill()
+                await process.wait()
+                if os.path.exists(audio_path):
+                    os.remove(audio_path)
+                raise
             
-            if result.returncode == 0 and os.path.exists(audio_path) and os.path.getsize(audio_path) > 0:
+            if process.returncode == 0 and os.path.exists(audio_path) and os.path.getsize(audio_path) > 0:
                 return {
                     "success": True,
                     "audio_url": f"/audio/{audio_filename}",
@@ -192,7 +624,7 @@ class WorkingFreeTTSService:
                     "provider": "espeak (local)"
                 }
             else:
-                return {"success": False, "error": "espeak command failed"}
+                return {"success": False, "error": f"espeak command failed: {stderr.decode(errors='replace').strip()}"}
                 
         except Exception as e:
             return {"success": False, "error": f"espeak error: {str(e)}"}
@@ -230,11 +662,28 @@ class WorkingFreeTTSService:
             "output_directory": self.output_dir,
             "available_characters": len(self.character_voices),
             "character_voices": list(self.character_voices.keys()),
+            "single_flight": get_single_flight("tts").get_stats(),
+            "http_providers": {provider: client.get_info() for provider, client in self.http_clients.items()},
+            "espeak_timeout_s": self.espeak_timeout,
+            "provider_strategy": {
+                "strategy": self.provider_strategy,
+                "hedge_delay_s": self.hedge_delay,
+                **self.race_stats
+            },
+            "provider_order": self.provider_order(),
+            "provider_health": {provider: breaker.get_info() for provider, breaker in self.breakers.items()},
+            "audio_cache": self.audio_cache.get_stats() if self.audio_cache is not None else {"enabled": False},
+            "greetings": self.greeting_status,
             "features": [
                 "No API key required",
-                "Multiple service fallbacks", 
+                "Hedged provider fallbacks", 
                 "Character-specific voices",
-                "Fast generation"
+                "Fast generation",
+                "Sentence-pipelined synthesis",
+                "Pooled async provider connections",
+                "Content-addressed audio cache",
+                "Provider circuit breakers",
+                "Pre-rendered greetings"
             ]
         }
     
@@ -251,11 +700,58 @@ class WorkingFreeTTSService:
             "speed": config["speed"],
             "pitch": config["pitch"]
         }
+    
+    async def aclose(self):
+        upgrades = list(self.greeting_upgrades.values())
+        for task in upgrades:
+            task.cancel()
+        await asyncio.gather(*upgrades, return_exceptions=True)
+        for client in self.http_clients.values():
+            await client.aclose()
+        if self.audio_cache is not None:
+            await asyncio.to_thread(self.audio_cache.save)
+        logger.info("🔌 Closed TTS provider connection pools")
 
 _tts_instance: Optional[WorkingFreeTTSService] = None
+_tts_instance_lock = threading.Lock()
+
+def _provider_http_settings(provider: str) -> Dict:
+    prefix = f"TTS_{provider.upper()}_"
+    return {
+        "connect_timeout": float(os.getenv(prefix + "CONNECT_TIMEOUT", "3")),
+        "read_timeout": float(os.getenv(prefix + "READ_TIMEOUT", "10")),
+        "max_connections": int(os.getenv(prefix + "MAX_CONNECTIONS", "8")),
+        "max_keepalive_connections": int(os.getenv(prefix + "MAX_KEEPALIVE", "4"))
+    }
 
 def get_tts_service() -> WorkingFreeTTSService:
     global _tts_instance
-    if _tts_instance is None:
-        _tts_instance = WorkingFreeTTSService()
+    if _tts_instance is not None:
+        return _tts_instance
+    
+    with _tts_instance_lock:
+        if _tts_instance is None:
+            _tts_instance = WorkingFreeTTSService(
+                http_settings={provider: _provider_http_settings(provider) for provider in ("streamelements", "voicerss")},
+                espeak_timeout=float(os.getenv("TTS_ESPEAK_TIMEOUT", "10")),
+                cache_enabled=os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true",
+                cache_max_entries=int(os.getenv("TTS_CACHE_MAX_ENTRIES", "2000")),
+                provider_strategy=os.getenv("TTS_PROVIDER_STRATEGY", "hedged").lower(),
+                hedge_delay=int(os.getenv("TTS_HEDGE_DELAY_MS", "1500")) / 1000,
+                breaker_settings={
+                    "window": int(os.getenv("TTS_BREAKER_WINDOW", "20")),
+                    "window_seconds": float(os.getenv("TTS_BREAKER_WINDOW_SECONDS", "120")),
+                    "min_calls": int(os.getenv("TTS_BREAKER_MIN_CALLS", "5")),
+                    "failure_rate_threshold": float(os.getenv("TTS_BREAKER_FAILURE_RATE", "0.5")),
+                    "consecutive_failures": int(os.getenv("TTS_BREAKER_CONSECUTIVE_FAILURES", "3")),
+                    "open_seconds": float(os.getenv("TTS_BREAKER_OPEN_SECONDS", "30"))
+                },
+                greeting_retry_seconds=float(os.getenv("TTS_GREETING_RETRY_SECONDS", "60"))
+            )
     return _tts_instance
+
+async def shutdown_tts_service():
+    global _tts_instance
+    if _tts_instance is not None:
+        await _tts_instance.aclose()
+        _tts_instance = None
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+class TTSAudioCache:
+    """Content-addressed store for synthesized speech.
+
+    Audio is keyed by a hash of (character_id, voice config, provider, text) and
+    lives in cache_dir as <key>.<ext>. Files are moved into place with
+    os.replace, so a reader never sees a partial file, and the index is
+    rewritten the same way so it survives restarts. Least recently used entries
+    are evicted past max_entries, except pinned ones: an entry pinned under a
+    label (such as a character's greeting) stays until another entry takes over
+    that label.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir: str, url_prefix: str, max_entries: int = 2000):
+        self.cache_dir = cache_dir
+        self.url_prefix = url_prefix.rstrip("/")
+        self.max_entries = max_entries
+        self.index_path = os.path.join(cache_dir, self.INDEX_FILE)
+        self.entries: Dict[str, Dict] = {}
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+        logger.info(f"🗄️ TTS audio cache ready: {len(self.entries)} clips in {cache_dir}")
+
+    @staticmethod
+    def make_key(character_id: str, voice_config: Dict, provider: str, text: str) -> str:
+        payload = json.dumps(
+            [character_id, voice_config, provider, " ".join(text.split())],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, character_id: str, voice_config: Dict, providers: Iterable[str], text: str) -> Optional[Dict]:
+        """Cached audio for the first provider in `providers` that has this text."""
+        for provider in providers:
+            key = self.make_key(character_id, voice_config, provider, text)
+            entry = self.entries.get(key)
+            if entry is None:
+                continue
+
+            audio_path = os.path.join(self.cache_dir, entry["filename"])
+            if not os.path.exists(audio_path):
+                with self._lock:
+                    self.entries.pop(key, None)
+                continue
+
+            entry["last_used"] = time.time()
+            entry["hits"] += 1
+            self.stats["hits"] += 1
+            return self._result(entry)
+
+        self.stats["misses"] += 1
+        return None
+
+    def store(self, character_id: str, voice_config: Dict, provider: str, text: str, audio_path: str) -> Dict:
+        """Moves a freshly synthesized file into the cache and returns its entry.
+
+        Blocking (file moves and an index rewrite); call it through asyncio.to_thread.
+        """
+        key = self.make_key(character_id, voice_config, provider, text)
+        extension = os.path.splitext(audio_path)[1] or ".bin"
+        filename = f"{key}{extension}"
+
+        with self._lock:
+            os.replace(audio_path, os.path.join(self.cache_dir, filename))
+            now = time.time()
+            entry = {
+                "key": key,
+                "filename": filename,
+                "character_id": character_id,
+                "provider": provider,
+                "file_size": os.path.getsize(os.path.join(self.cache_dir, filename)),
+                "created_at": now,
+                "last_used": now,
+                "hits": 0,
+                "pin": None
+            }
+            self.entries[key] = entry
+            self.stats["stores"] += 1
+            self._evict_lru()
+            self._write_index()
+
+        return self._result(entry)
+
+    def pin(self, key: str, label: str):
+        """Exempts an entry from eviction under `label`, dropping whatever entry
+        held that label before (e.g. a greeting rendered with old voice settings).
+
+        Blocking when it changes anything; call it through asyncio.to_thread.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry.get("pin") == label:
+            return
+
+        with self._lock:
+            for previous in [other for other in self.entries.values() if other.get("pin") == label]:
+                del self.entries[previous["key"]]
+                self._remove_file(previous["filename"])
+                logger.info(f"🗑️ Replaced pinned TTS audio for {label}")
+            entry["pin"] = label
+            self._write_index()
+
+    def clear(self):
+        with self._lock:
+            for entry in self.entries.values():
+                self._remove_file(entry["filename"])
+            self.entries.clear()
+            self._write_index()
+
+    def save(self):
+        """Persists last-used times so LRU order carries over a restart."""
+        with self._lock:
+            self._write_index()
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": len(self.entries),
+            "pinned": sum(1 for entry in self.entries.values() if entry.get("pin")),
+            "bytes": sum(entry["file_size"] for entry in self.entries.values()),
+            "max_entries": self.max_entries,
+            "cache_dir": self.cache_dir
+        }
+
+    def _result(self, entry: Dict) -> Dict:
+        return {
+            "cache_key": entry["key"],
+            "audio_url": f"{self.url_prefix}/{entry['filename']}",
+            "audio_path": os.path.join(self.cache_dir, entry["filename"]),
+            "provider": entry["provider"],
+            "file_size": entry["file_size"]
+        }
+
+    def _evict_lru(self):
+        overflow = len(self.entries) - self.max_entries
+        if overflow <= 0:
+            return
+
+        unpinned = [entry for entry in self.entries.values() if not entry.get("pin")]
+        for entry in sorted(unpinned, key=lambda entry: entry["last_used"])[:overflow]:
+            del self.entries[entry["key"]]
+            self._remove_file(entry["filename"])
+            self.stats["evictions"] += 1
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            entries = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Unreadable TTS cache index, starting empty: {e}")
+            entries = {}
+
+        self.entries = {
+            key: entry for key, entry in entries.items()
+            if os.path.exists(os.path.join(self.cache_dir, entry["filename"]))
+        }
+        self._evict_lru()
+
+        known_files = {entry["filename"] for entry in self.entries.values()}
+        for filename in os.listdir(self.cache_dir):
+            if filename != self.INDEX_FILE and filename not in known_files:
+                self._remove_file(filename)
+
+        if len(self.entries) != len(entries):
+            logger.info(f"🧹 Dropped {len(entries) - len(self.entries)} stale TTS cache entries")
+            self._write_index()
+
+    def _write_index(self):
+        fd, temp_path = tempfile.mkstemp(prefix="index_", suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(temp_path, self.index_path)
+        except BaseException:
+            self._remove_file(os.path.basename(temp_path))
+            raise
+
+    def _remove_file(self, filename: str):
+        try:
+            os.unlink(os.path.join(self.cache_dir, filename))
+        except FileNotFoundError:
+            pass
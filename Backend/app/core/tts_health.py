@@ -0,0 +1,141 @@
+import logging
+import time
+from collections import deque
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ProviderCircuitBreaker:
+    """Tracks one TTS provider's health and stops sending it traffic while it fails.
+
+    closed: calls go through; outcomes fill a rolling window of the last
+    `window` calls made within window_seconds. The breaker opens after
+    `consecutive_failures` failures in a row, or once the window holds
+    `min_calls` outcomes and the success rate falls below
+    1 - failure_rate_threshold. Outcomes age out, so a provider that was
+    demoted and stopped getting traffic is eventually ranked by preference again.
+    open: calls are refused for open_seconds.
+    half_open: a single probe call is let through; success closes the breaker,
+    failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        window_seconds: float = 120.0,
+        min_calls: int = 5,
+        failure_rate_threshold: float = 0.5,
+        consecutive_failures: int = 3,
+        open_seconds: float = 30.0,
+        latency_alpha: float = 0.3
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.consecutive_failures = consecutive_failures
+        self.open_seconds = open_seconds
+        self.latency_alpha = latency_alpha
+        self.window_seconds = window_seconds
+        self.outcomes: deque = deque(maxlen=window)
+        self.latency_ewma: Optional[float] = None
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0, "times_opened": 0}
+        self._state = self.CLOSED
+        self._failure_streak = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            logger.info(f"🩺 TTS provider {self.name} circuit half-open, allowing a probe")
+        return self._state
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        """Rolling success rate, or None until the window holds min_calls outcomes."""
+        self._expire_outcomes()
+        if len(self.outcomes) < self.min_calls:
+            return None
+        return sum(ok for _, ok in self.outcomes) / len(self.outcomes)
+
+    def available(self) -> bool:
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._probe_in_flight)
+
+    def acquire(self) -> bool:
+        """Claims a call slot; in half-open state only one probe at a time gets one."""
+        if not self.available():
+            self.stats["rejected"] += 1
+            return False
+        if self._state == self.HALF_OPEN:
+            self._probe_in_flight = True
+        return True
+
+    def release(self):
+        """Gives back a slot whose call was cancelled before it had an outcome."""
+        self._probe_in_flight = False
+
+    def record_success(self, latency_s: float):
+        self.stats["successes"] += 1
+        self._failure_streak = 0
+        self._update_latency(latency_s)
+
+        if self._state != self.CLOSED:
+            logger.info(f"✅ TTS provider {self.name} circuit closed")
+            self._state = self.CLOSED
+            self.outcomes.clear()
+        self.outcomes.append((time.monotonic(), True))
+        self._probe_in_flight = False
+
+    def record_failure(self, latency_s: float):
+        self.stats["failures"] += 1
+        self.outcomes.append((time.monotonic(), False))
+        self._failure_streak += 1
+        self._update_latency(latency_s)
+
+        if self._state == self.HALF_OPEN:
+            self._open("probe failed")
+        elif self._state == self.CLOSED:
+            if self._failure_streak >= self.consecutive_failures:
+                self._open(f"{self._failure_streak} failures in a row")
+            else:
+                success_rate = self.success_rate
+                if success_rate is not None and 1 - success_rate > self.failure_rate_threshold:
+                    self._open(f"success rate {success_rate:.0%} over {len(self.outcomes)} calls")
+        self._probe_in_flight = False
+
+    def get_info(self) -> Dict:
+        state = self.state
+        success_rate = self.success_rate
+        return {
+            "state": state,
+            "success_rate": round(success_rate, 3) if success_rate is not None else None,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "window_calls": len(self.outcomes),
+            "failure_streak": self._failure_streak,
+            "retry_in_s": round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1) if state == self.OPEN else None,
+            **self.stats
+        }
+
+    def _open(self, reason: str):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self.stats["times_opened"] += 1
+        logger.warning(f"🔌 TTS provider {self.name} circuit opened ({reason}), retrying in {self.open_seconds:g}s")
+
+    def _expire_outcomes(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self.outcomes and self.outcomes[0][0] < cutoff:
+            self.outcomes.popleft()
+
+    def _update_latency(self, latency_s: float):
+        if self.latency_ewma is None:
+            self.latency_ewma = latency_s
+        else:
+            self.latency_ewma += self.latency_alpha * (latency_s - self.latency_ewma)
@@ -0,0 +1,82 @@
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+class ProviderHTTPClient:
+    """Keep-alive HTTP client for one TTS provider.
+
+    Each provider gets its own connection pool, limits and timeouts, so a slow
+    provider can't starve another one's connections. New TCP connections and
+    TLS handshakes are counted through httpcore's trace hook; a request that
+    completes without opening a connection rode on a kept-alive one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        max_connections: int = 8,
+        max_keepalive_connections: int = 4,
+        keepalive_expiry: float = 30.0
+    ):
+        self.name = name
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            )
+        )
+        self.stats = {"requests": 0, "failures": 0, "new_connections": 0, "reused_connections": 0, "tls_handshakes": 0}
+        self._total_ms = 0.0
+
+    async def get(self, url: str, params: Optional[Dict] = None) -> httpx.Response:
+        connected = False
+
+        async def trace(event_name: str, info: Dict):
+            nonlocal connected
+            if event_name == "connection.connect_tcp.complete":
+                connected = True
+                self.stats["new_connections"] += 1
+            elif event_name == "connection.start_tls.complete":
+                self.stats["tls_handshakes"] += 1
+
+        self.stats["requests"] += 1
+        start_time = time.perf_counter()
+        try:
+            response = await self.client.get(url, params=params, extensions={"trace": trace})
+        except Exception:
+            self.stats["failures"] += 1
+            raise
+        finally:
+            self._total_ms += (time.perf_counter() - start_time) * 1000
+
+        if not connected:
+            self.stats["reused_connections"] += 1
+        return response
+
+    def get_info(self) -> Dict:
+        requests = self.stats["requests"]
+        completed = requests - self.stats["failures"]
+        return {
+            "connect_timeout_s": self.connect_timeout,
+            "read_timeout_s": self.read_timeout,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            **self.stats,
+            "connection_reuse_rate": round(self.stats["reused_connections"] / completed, 3) if completed else None,
+            "avg_request_ms": round(self._total_ms / requests, 1) if requests else None
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .stt import get_stt_service
+from .rag import get_rag_service
+from .llm import get_llm_service
+
+logger = logging.getLogger(__name__)
+
+class ServiceWarmup:
+    """Loads and warms the heavy singletons in parallel at startup.
+
+    The service counts as ready once every enabled component has finished
+    warming. STT and RAG failures only degrade it: they are reported and load
+    lazily on first use instead. Without the LLM no dialogue can be answered,
+    so a failed LLM warmup keeps the service not-ready and is retried every
+    retry_seconds until it succeeds.
+    """
+
+    REQUIRED_COMPONENTS = ("llm",)
+
+    def __init__(self, warm_stt: bool = True, warm_rag: bool = True, warm_llm: bool = True, retry_seconds: float = 30.0):
+        self.components: Dict[str, Callable[[], Awaitable]] = {}
+        if warm_stt:
+            self.components["stt"] = self._warm_stt
+        if warm_rag:
+            self.components["rag"] = self._warm_rag
+        if warm_llm:
+            self.components["llm"] = self._warm_llm
+
+        self.status = {
+            name: {"status": "pending", "duration_ms": None, "error": None}
+            for name in self.components
+        }
+        self.retry_seconds = retry_seconds
+        self.finished = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    async def run(self):
+        self.started_at = time.time()
+        logger.info(f"🔥 Warming up services: {', '.join(self.components) or 'none'}")
+
+        await asyncio.gather(*(self._run_component(name, warm) for name, warm in self.components.items()))
+
+        self.finished_at = time.time()
+        self.finished = True
+        failed = self.failed_components()
+        if failed:
+            logger.warning(f"⚠️ Warmup finished in {self.finished_at - self.started_at:.1f}s, failed: {', '.join(failed)}")
+        else:
+            logger.info(f"✅ Warmup finished in {self.finished_at - self.started_at:.1f}s")
+
+        while True:
+            retry = [name for name in self.failed_components() if name in self.REQUIRED_COMPONENTS]
+            if not retry:
+                break
+            logger.info(f"🔁 Retrying warmup of {', '.join(retry)} in {self.retry_seconds:.0f}s")
+            await asyncio.sleep(self.retry_seconds)
+            await asyncio.gather(*(self._run_component(name, self.components[name]) for name in retry))
+
+    def failed_components(self) -> List[str]:
+        return [name for name, status in self.status.items() if status["status"] == "failed"]
+
+    @property
+    def ready(self) -> bool:
+        return self.finished and not any(name in self.REQUIRED_COMPONENTS for name in self.failed_components())
+
+    async def _run_component(self, name: str, warm: Callable[[], Awaitable]):
+        status = self.status[name]
+        status["status"] = "warming"
+        start = time.time()
+        try:
+            await warm()
+            status["status"] = "ready"
+            status["error"] = None
+        except Exception as e:
+            logger.error(f"❌ Warmup of {name} failed: {e}")
+            status["status"] = "failed"
+            status["error"] = str(e)
+        finally:
+            status["duration_ms"] = round((time.time() - start) * 1000, 1)
+
+    async def _warm_stt(self):
+        stt_service = await asyncio.to_thread(get_stt_service)
+        await asyncio.to_thread(stt_service.warm_up)
+
+    async def _warm_rag(self):
+        rag_service = await asyncio.to_thread(get_rag_service)
+        await asyncio.to_thread(rag_service.warm_up)
+
+    async def _warm_llm(self):
+        llm_service = await asyncio.to_thread(get_llm_service)
+        results = await llm_service.warm_up()
+        if not any(result["success"] for result in results.values()):
+            raise Exception(f"No Ollama backend could load {llm_service.model_name}")
+
+    def get_status(self) -> Dict:
+        if not self.finished:
+            state = "warming"
+        elif not self.ready:
+            state = "failed"
+        elif self.failed_components():
+            state = "degraded"
+        else:
+            state = "ready"
+
+        return {
+            "ready": self.ready,
+            "status": state,
+            "components": self.status,
+            "warmup_seconds": round(self.finished_at - self.started_at, 1) if self.finished_at else None
+        }
+
+_warmup_instance: Optional[ServiceWarmup] = None
+
+def get_service_warmup() -> ServiceWarmup:
+    global _warmup_instance
+    if _warmup_instance is None:
+        _warmup_instance = ServiceWarmup(
+            warm_stt=os.getenv("WARMUP_STT", "true").lower() == "true",
+            warm_rag=os.getenv("WARMUP_RAG", "true").lower() == "true",
+            warm_llm=os.getenv("WARMUP_LLM", "true").lower() == "true",
+            retry_seconds=float(os.getenv("WARMUP_RETRY_SECONDS", "30"))
+        )
+    return _warmup_instance
@@ -1,11 +1,19 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+import asyncio
 import os
 import logging
 from contextlib import asynccontextmanager
 
-from .api.dialogue import router as dialogue_router
+from .api.dialogue import router as dialogue_router, CHARACTERS, MAX_REQUEST_BYTES
+from .api.voice_stream import router as voice_stream_router
+from .core.llm import shutdown_llm_service
+from .core.stt import shutdown_stt_service
+from .core.tts import get_tts_service, shutdown_tts_service
+from .core.warmup import get_service_warmup
+from .utils.uploads import UploadSizeLimitMiddleware
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,8 +25,21 @@ async def lifespan(app: FastAPI):
     os.makedirs("generated_audio", exist_ok=True)
     logger.info("📁 Audio directory ready")
     
+    warmup_task = asyncio.create_task(get_service_warmup().run())
+    background_tasks = [warmup_task]
+    
+    if os.getenv("TTS_PRERENDER_GREETINGS", "true").lower() == "true":
+        greetings = {character_id: character["greeting"] for character_id, character in CHARACTERS.items()}
+        background_tasks.append(asyncio.create_task(get_tts_service().prerender_greetings(greetings)))
+    
     yield
     
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await shutdown_llm_service()
+    await shutdown_tts_service()
+    shutdown_stt_service()
     logger.info("⏹️ Shutting down Chronoverse Backend")
 
 app = FastAPI(
@@ -28,6 +49,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=MAX_REQUEST_BYTES)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -39,6 +62,7 @@ app.add_middleware(
 app.mount("/audio", StaticFiles(directory="generated_audio"), name="audio")
 
 app.include_router(dialogue_router, prefix="/api/v1")
+app.include_router(voice_stream_router, prefix="/api/v1")
 
 @app.get("/")
 async def root():
@@ -55,3 +79,11 @@ async def health_check():
         "service": "chronoverse-backend",
         "version": "1.0.0"
     }
+
+@app.get("/ready")
+async def readiness_check():
+    warmup_status = get_service_warmup().get_status()
+    return JSONResponse(
+        status_code=200 if warmup_status["ready"] else 503,
+        content=warmup_status
+    )
@@ -17,6 +17,7 @@ class DialogueResponse(BaseModel):
     processing_time_ms: int
     audio_url: Optional[str] = None
     session_id: str
+    served_by: Optional[str] = Field(None, description="Which path produced the reply: primary, hedge, cache, template_deadline, template_error, greeting")
     timestamp: datetime = Field(default_factory=datetime.now)
 
 class ErrorResponse(BaseModel):
@@ -0,0 +1,413 @@
+import io
+import logging
+import mmap
+import struct
+from collections import deque
+from math import gcd
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import opuslib
+except ImportError:
+    opuslib = None
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:
+    resample_poly = None
+
+logger = logging.getLogger(__name__)
+
+TARGET_SAMPLE_RATE = 16000
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+WAV_SAMPLE_TYPES = {
+    (WAVE_FORMAT_PCM, 8): (np.dtype("u1"), 128.0, 128.0),
+    (WAVE_FORMAT_PCM, 16): (np.dtype("<i2"), 0.0, 32768.0),
+    (WAVE_FORMAT_PCM, 32): (np.dtype("<i4"), 0.0, 2147483648.0),
+    (WAVE_FORMAT_IEEE_FLOAT, 32): (np.dtype("<f4"), 0.0, 1.0),
+    (WAVE_FORMAT_IEEE_FLOAT, 64): (np.dtype("<f8"), 0.0, 1.0)
+}
+
+RAW_PCM_MEDIA_TYPES = ("audio/pcm", "audio/x-raw")
+RAW_PCM_RATE_RANGE = (8000, 192000)
+
+def pcm16_to_float32(data: bytes) -> np.ndarray:
+    usable = len(data) - len(data) % 2
+    return np.frombuffer(memoryview(data)[:usable], dtype="<i2").astype(np.float32) / 32768.0
+
+def raw_pcm_sample_rate(content_type: Optional[str]) -> Optional[int]:
+    """Sample rate for headerless 16-bit little-endian PCM uploads
+    (e.g. "audio/pcm; rate=16000"), or None for any other content type.
+
+    Raises ValueError if the rate is not an integer within RAW_PCM_RATE_RANGE.
+    """
+    if not content_type:
+        return None
+
+    media_type, *params = [part.strip() for part in content_type.lower().split(";")]
+    if media_type not in RAW_PCM_MEDIA_TYPES:
+        return None
+
+    for param in params:
+        if param.startswith("rate="):
+            rate = param[len("rate="):].strip('"')
+            low, high = RAW_PCM_RATE_RANGE
+            if not rate.isdigit() or not low <= int(rate) <= high:
+                raise ValueError(f"PCM sample rate must be an integer between {low} and {high} Hz, got {rate!r}")
+            return int(rate)
+    return TARGET_SAMPLE_RATE
+
+def resample(samples: np.ndarray, orig_sr: int, target_sr: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    if orig_sr == target_sr or len(samples) == 0:
+        return samples
+
+    if resample_poly is not None:
+        divisor = gcd(orig_sr, target_sr)
+        return resample_poly(samples, target_sr // divisor, orig_sr // divisor).astype(np.float32)
+
+    duration = len(samples) / orig_sr
+    target_length = int(round(duration * target_sr))
+    source_times = np.arange(len(samples)) / orig_sr
+    target_times = np.arange(target_length) / target_sr
+    return np.interp(target_times, source_times, samples).astype(np.float32)
+
+def read_wav_header(data) -> Optional[Tuple[int, int, int, int, int, int]]:
+    """Returns (format_tag, channels, sample_rate, bits_per_sample, data_offset,
+    data_size) from the start of a WAV file, or None if it isn't one.
+
+    Only the bytes up to the data chunk header are needed.
+    """
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+
+    offset = 12
+    wav_format = None
+
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", data, offset + 4)[0]
+        body = offset + 8
+
+        if chunk_id == b"fmt " and chunk_size >= 16 and body + 16 <= len(data):
+            format_tag, channels, sample_rate = struct.unpack_from("<HHI", data, body)
+            bits_per_sample = struct.unpack_from("<H", data, body + 14)[0]
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26 and body + 26 <= len(data):
+                format_tag = struct.unpack_from("<H", data, body + 24)[0]
+            wav_format = (format_tag, channels, sample_rate, bits_per_sample)
+
+        elif chunk_id == b"data":
+            if wav_format is None:
+                return None
+            return (*wav_format, body, chunk_size)
+
+        offset = body + chunk_size + (chunk_size & 1)
+
+    return None
+
+def wav_duration(data, total_size: Optional[int] = None) -> Optional[float]:
+    """Duration in seconds from a WAV header; total_size (the full file size)
+    covers streamed WAVs whose data chunk size is left as 0 or 0xFFFFFFFF."""
+    header = read_wav_header(data)
+    if header is None:
+        return None
+
+    _, channels, sample_rate, bits_per_sample, data_offset, data_size = header
+    if data_size in (0, 0xFFFFFFFF) and total_size:
+        data_size = total_size - data_offset
+    bytes_per_second = sample_rate * channels * bits_per_sample // 8
+    return data_size / bytes_per_second if bytes_per_second else None
+
+def parse_wav(data) -> Optional[Tuple[np.ndarray, int]]:
+    """Returns (mono float32 samples, sample rate) for uncompressed WAV, or None.
+
+    data can be any buffer (bytes, memoryview, mmap). Samples are viewed
+    straight out of it; only integer formats and multi-channel audio need a
+    converted copy.
+    """
+    header = read_wav_header(data)
+    if header is None:
+        return None
+
+    format_tag, channels, sample_rate, bits_per_sample, body, chunk_size = header
+    sample_type = WAV_SAMPLE_TYPES.get((format_tag, bits_per_sample))
+    if sample_type is None or channels < 1:
+        return None
+
+    dtype, offset_value, scale = sample_type
+    end = len(data) if chunk_size in (0, 0xFFFFFFFF) else min(body + chunk_size, len(data))
+    frame_bytes = dtype.itemsize * channels
+    end -= (end - body) % frame_bytes
+
+    samples = np.frombuffer(memoryview(data)[body:end], dtype=dtype)
+    if dtype != np.float32 or offset_value or scale != 1.0:
+        samples = (samples.astype(np.float32) - offset_value) / scale
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return samples, sample_rate
+
+def decode_audio(data: Union[bytes, str], sample_rate: int = TARGET_SAMPLE_RATE) -> Tuple[np.ndarray, str]:
+    """Decodes an upload (bytes, or the path of a spooled file) to mono float32
+    at sample_rate.
+
+    Uncompressed WAV takes the NumPy fast path, memory-mapping files instead of
+    reading them; everything else (mp3, ogg, m4a, ...) falls back to
+    librosa/ffmpeg. Returns the samples and the path used.
+    """
+    source = data
+    if isinstance(data, str):
+        with open(data, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    parsed = parse_wav(data)
+    if parsed is not None:
+        samples, source_rate = parsed
+        return resample(samples, source_rate, sample_rate), "wav"
+
+    import librosa
+    samples, _ = librosa.load(source if isinstance(source, str) else io.BytesIO(data), sr=sample_rate, mono=True)
+    return samples.astype(np.float32, copy=False), "librosa"
+
+def find_speech(
+    samples: np.ndarray,
+    sample_rate: int = TARGET_SAMPLE_RATE,
+    frame_ms: int = 30,
+    threshold: float = 0.002,
+    margin_db: float = 10.0,
+    noise_percentile: float = 10.0,
+    min_speech_ms: int = 90,
+    padding_ms: int = 200
+) -> Optional[Tuple[int, int]]:
+    """Returns the (start, end) sample range spanning all speech, padded by
+    padding_ms on each side, or None if the clip holds no speech.
+
+    The noise floor is the clip's noise_percentile frame energy; a frame is
+    speech when it is margin_db above that floor and above the absolute
+    threshold, so quiet recordings are judged against their own background.
+    A clip is only rejected when nothing rises even half the margin above the
+    floor. Borderline clips, with some louder frames but less than
+    min_speech_ms of clear speech, come back whole so the model can decide.
+    """
+    frame_size = sample_rate * frame_ms // 1000
+    frame_count = len(samples) // frame_size
+    if frame_count == 0:
+        return None
+
+    frames = samples[:frame_count * frame_size].reshape(frame_count, frame_size)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    noise_floor = float(np.percentile(rms, noise_percentile))
+    min_frames = max(1, min_speech_ms // frame_ms)
+
+    speech_frames = np.flatnonzero(rms > max(threshold, noise_floor * 10 ** (margin_db / 20)))
+    if len(speech_frames) < min_frames:
+        if np.count_nonzero(rms > max(threshold, noise_floor * 10 ** (margin_db / 40))) >= min_frames:
+            return 0, len(samples)
+        return None
+
+    padding = sample_rate * padding_ms // 1000
+    start = max(0, int(speech_frames[0]) * frame_size - padding)
+    end = min(len(samples), (int(speech_frames[-1]) + 1) * frame_size + padding)
+    return start, end
+
+class OpusPacketDecoder:
+    """Decodes raw Opus packets (one per message, e.g. from WebCodecs) to float32 mono."""
+
+    MAX_FRAME_MS = 120
+
+    def __init__(self, sample_rate: int = TARGET_SAMPLE_RATE):
+        if opuslib is None:
+            raise RuntimeError("Opus input requires the opuslib package")
+        self.sample_rate = sample_rate
+        self.decoder = opuslib.Decoder(sample_rate, 1)
+        self.max_frame_size = sample_rate * self.MAX_FRAME_MS // 1000
+
+    def decode(self, packet: bytes) -> np.ndarray:
+        return pcm16_to_float32(self.decoder.decode(bytes(packet), self.max_frame_size))
+
+    def flush(self) -> np.ndarray:
+        """Nothing is held back between packets."""
+        return np.zeros(0, dtype=np.float32)
+
+class PCM16StreamDecoder:
+    """Decodes a stream of 16-bit little-endian PCM messages to float32 at target_sr.
+
+    Message boundaries don't have to fall on sample or filter boundaries: an odd
+    trailing byte is carried into the next message, and the resampler keeps
+    enough past input and holds back enough future input (a couple of
+    milliseconds) that the output matches resampling the whole stream at once.
+    flush() ends the stream: it returns the held-back samples and starts over.
+    """
+
+    def __init__(self, sample_rate: int, target_sr: int = TARGET_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.target_sr = target_sr
+        divisor = gcd(sample_rate, target_sr)
+        self.up = target_sr // divisor
+        self.down = sample_rate // divisor
+        # Input samples on either side of an output sample that affect it:
+        # resample_poly's default filter spans 10 * max(up, down) taps each way
+        # at the upsampled rate, np.interp only the neighbouring sample.
+        self.margin = -(-10 * max(self.up, self.down) // self.up) + 1 if resample_poly is not None else 1
+        self._pending = b""
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0
+        self._next_output = 0
+
+    def decode(self, data: bytes) -> np.ndarray:
+        data = self._pending + bytes(data)
+        usable = len(data) - len(data) % 2
+        self._pending = data[usable:]
+        samples = pcm16_to_float32(data[:usable])
+        if self.sample_rate == self.target_sr:
+            return samples
+
+        self._buffer = np.concatenate((self._buffer, samples))
+        settled = self._buffer_start + len(self._buffer) - self.margin
+        end_output = settled * self.up // self.down + 1 if settled >= 0 else 0
+        if end_output <= self._next_output:
+            return np.zeros(0, dtype=np.float32)
+
+        # _buffer_start stays a multiple of down, so the buffer's first output
+        # sample lines up with an output sample of the whole stream.
+        first_output = self._buffer_start * self.up // self.down
+        resampled = resample(self._buffer, self.sample_rate, self.target_sr)
+        end_output = min(end_output, first_output + len(resampled))
+        output = resampled[self._next_output - first_output:end_output - first_output]
+        self._next_output = end_output
+
+        keep_from = (self._next_output * self.down // self.up - self.margin) // self.down * self.down
+        if keep_from > self._buffer_start:
+            self._buffer = self._buffer[keep_from - self._buffer_start:]
+            self._buffer_start = keep_from
+        return output
+
+    def flush(self) -> np.ndarray:
+        tail = np.zeros(0, dtype=np.float32)
+        if self.sample_rate != self.target_sr and len(self._buffer):
+            first_output = self._buffer_start * self.up // self.down
+            tail = resample(self._buffer, self.sample_rate, self.target_sr)[self._next_output - first_output:]
+
+        self._pending = b""
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0
+        self._next_output = 0
+        return tail
+
+class EnergyVAD:
+    """Frame-energy voice activity detector for a live 16 kHz float32 stream.
+
+    feed() returns events in order: ("speech_start", None) when speech begins,
+    ("segment", samples) when a stretch of speech is followed by silence_ms of
+    silence or reaches max_segment_s, and ("turn_end", None) after
+    end_of_turn_ms of silence following at least one segment (0 disables it).
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = TARGET_SAMPLE_RATE,
+        frame_ms: int = 30,
+        threshold: float = 0.015,
+        speech_start_ms: int = 90,
+        silence_ms: int = 500,
+        end_of_turn_ms: int = 1500,
+        max_segment_s: float = 20.0,
+        pre_roll_ms: int = 300
+    ):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.threshold = threshold
+        self.speech_start_frames = max(1, speech_start_ms // frame_ms)
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.end_of_turn_frames = end_of_turn_ms // frame_ms if end_of_turn_ms > 0 else 0
+        self.max_segment_frames = int(max_segment_s * 1000 // frame_ms)
+        self.noise_floor = threshold / 3
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll: deque = deque(maxlen=max(1, pre_roll_ms // frame_ms) + self.speech_start_frames)
+        self._segment: List[np.ndarray] = []
+        self.in_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self._turn_silence = 0
+        self._turn_has_speech = False
+
+    def _is_speech(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.mean(frame * frame)))
+        is_speech = rms > max(self.threshold, self.noise_floor * 3)
+        if not is_speech:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return is_speech
+
+    def feed(self, samples: np.ndarray) -> List[Tuple[str, Optional[np.ndarray]]]:
+        events: List[Tuple[str, Optional[np.ndarray]]] = []
+        buffer = np.concatenate([self._pending, samples]) if len(self._pending) else samples
+        frame_count = len(buffer) // self.frame_size
+
+        for index in range(frame_count):
+            frame = buffer[index * self.frame_size:(index + 1) * self.frame_size]
+            self._process_frame(frame, events)
+
+        self._pending = buffer[frame_count * self.frame_size:].copy()
+        return events
+
+    def _process_frame(self, frame: np.ndarray, events: List[Tuple[str, Optional[np.ndarray]]]):
+        is_speech = self._is_speech(frame)
+
+        if not self.in_speech:
+            self._pre_roll.append(frame)
+            self._speech_run = self._speech_run + 1 if is_speech else 0
+
+            if self._speech_run >= self.speech_start_frames:
+                self.in_speech = True
+                self._segment = list(self._pre_roll)
+                self._pre_roll.clear()
+                self._silence_run = 0
+                self._turn_silence = 0
+                events.append(("speech_start", None))
+            elif self._turn_has_speech and self.end_of_turn_frames:
+                self._turn_silence += 1
+                if self._turn_silence >= self.end_of_turn_frames:
+                    self._turn_has_speech = False
+                    self._turn_silence = 0
+                    events.append(("turn_end", None))
+            return
+
+        self._segment.append(frame)
+        self._silence_run = 0 if is_speech else self._silence_run + 1
+
+        if self._silence_run >= self.silence_frames or len(self._segment) >= self.max_segment_frames:
+            events.append(("segment", self._close_segment()))
+            self._turn_silence = self._silence_run
+
+    def _close_segment(self) -> np.ndarray:
+        segment = np.concatenate(self._segment)
+        self._segment = []
+        self.in_speech = False
+        self._speech_run = 0
+        self._turn_has_speech = True
+        return segment
+
+    def flush(self) -> Optional[np.ndarray]:
+        segment = None
+        if self.in_speech:
+            if len(self._pending):
+                self._segment.append(self._pending)
+            segment = self._close_segment()
+        self.reset()
+        return segment
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll.clear()
+        self._segment = []
+        self.in_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self._turn_silence = 0
+        self._turn_has_speech = False
@@ -0,0 +1,178 @@
+import asyncio
+import io
+import json
+import logging
+import mmap
+import os
+import tempfile
+from typing import Optional, Union
+
+from fastapi import HTTPException
+
+from .audio_processing import wav_duration
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+logger = logging.getLogger(__name__)
+
+class UploadTooLargeError(Exception):
+    pass
+
+class AudioSpool:
+    """Buffers an upload in memory up to memory_bytes, then spills it to a named
+    temp file so the STT workers can open it by its real path instead of
+    receiving a copy.
+
+    Writing more than max_bytes raises UploadTooLargeError. The temp file
+    lives until close(), which the caller defers until the transcription job
+    using it has finished or been cancelled.
+    """
+
+    HEAD_BYTES = 64 * 1024
+
+    def __init__(self, max_bytes: int, memory_bytes: int, directory: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.directory = directory
+        self.size = 0
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._file = None
+        self._head = b""
+
+    @classmethod
+    async def from_upload(
+        cls,
+        upload,
+        max_bytes: int,
+        memory_bytes: int,
+        directory: Optional[str] = None,
+        chunk_size: int = 64 * 1024
+    ) -> "AudioSpool":
+        spool = cls(max_bytes, memory_bytes, directory)
+        try:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                if spool.on_disk or spool.size + len(chunk) > memory_bytes:
+                    await asyncio.to_thread(spool.write, chunk)
+                else:
+                    spool.write(chunk)
+            await asyncio.to_thread(spool.flush)
+        except BaseException:
+            spool.close()
+            raise
+        return spool
+
+    @property
+    def on_disk(self) -> bool:
+        return self._file is not None
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._file.name if self._file is not None else None
+
+    def write(self, chunk: bytes):
+        if self.size + len(chunk) > self.max_bytes:
+            raise UploadTooLargeError(f"Audio upload exceeds {self.max_bytes // 1024} KB")
+
+        if len(self._head) < self.HEAD_BYTES:
+            self._head += chunk[:self.HEAD_BYTES - len(self._head)]
+
+        if self._file is None and self.size + len(chunk) > self.memory_bytes:
+            self._file = tempfile.NamedTemporaryFile(prefix="upload_", dir=self.directory, delete=False)
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+            logger.info(f"💾 Spooling upload to {self._file.name}")
+
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer.write(chunk)
+        self.size += len(chunk)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def source(self) -> Union[bytes, str]:
+        """The upload for decode_audio: its bytes while in memory, else the temp file path."""
+        if self._file is not None:
+            return self._file.name
+        return self._buffer.getvalue()
+
+    def view(self):
+        """Zero-copy view of the upload: a memoryview, or an mmap of the temp file."""
+        if self._file is not None:
+            return mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._buffer.getbuffer()
+
+    def probe_duration(self) -> Optional[float]:
+        """Duration from the file header without decoding, or None if unknown."""
+        duration = wav_duration(self._head, self.size)
+        if duration is not None or soundfile is None:
+            return duration
+
+        try:
+            info = soundfile.info(self.path if self.on_disk else io.BytesIO(self._buffer.getbuffer()))
+            return info.duration
+        except Exception:
+            return None
+
+    def close(self):
+        """Deletes the temp file, if any. Safe to call more than once."""
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.unlink(self._file.name)
+            except FileNotFoundError:
+                pass
+            self._file = None
+        self._buffer = None
+
+class UploadSizeLimitMiddleware:
+    """Answers 413 as soon as a request body passes max_bytes: right away from
+    Content-Length, or while a chunked body is still arriving."""
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body exceeds {self.max_bytes // 1024} KB"
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            logger.warning(f"🚫 Rejecting {content_length.decode()} byte request to {scope['path']}")
+            await self._send_413(send, detail)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    logger.warning(f"🚫 Aborting request to {scope['path']} after {received} bytes")
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _send_413(send, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
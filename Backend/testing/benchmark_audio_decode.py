@@ -0,0 +1,105 @@
+import argparse
+import io
+import os
+import struct
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.audio_processing import decode_audio, pcm16_to_float32, resample
+
+def speech_like(seconds: float, sample_rate: int, channels: int = 1) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 180 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    signal = signal.astype(np.float32)
+    return np.repeat(signal[:, None], channels, axis=1) if channels > 1 else signal
+
+def wav_int16(samples: np.ndarray, sample_rate: int) -> bytes:
+    channels = samples.shape[1] if samples.ndim > 1 else 1
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((samples * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+def wav_float32(samples: np.ndarray, sample_rate: int) -> bytes:
+    data = samples.astype("<f4").tobytes()
+    fmt = struct.pack("<HHIIHH", 3, 1, sample_rate, sample_rate * 4, 4, 32)
+    return (
+        b"RIFF" + struct.pack("<I", 4 + 8 + len(fmt) + 8 + len(data)) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"data" + struct.pack("<I", len(data)) + data
+    )
+
+def compressed(samples: np.ndarray, sample_rate: int, audio_format: str):
+    try:
+        import soundfile
+    except ImportError:
+        return None
+    buffer = io.BytesIO()
+    soundfile.write(buffer, samples, sample_rate, format=audio_format)
+    return buffer.getvalue()
+
+def time_decode(decode, data, repeats: int) -> float:
+    decode(data)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        decode(data)
+    return (time.perf_counter() - start) / repeats * 1000
+
+def librosa_decode(data: bytes):
+    import librosa
+    return librosa.load(io.BytesIO(data), sr=16000)
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio decode cost per upload format")
+    parser.add_argument("--seconds", type=float, default=10.0, help="clip length")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("WAV 16 kHz mono int16", wav_int16(speech_like(args.seconds, 16000), 16000)),
+        ("WAV 48 kHz stereo int16", wav_int16(speech_like(args.seconds, 48000, channels=2), 48000)),
+        ("WAV 44.1 kHz mono float32", wav_float32(speech_like(args.seconds, 44100), 44100)),
+        ("FLAC 16 kHz mono", compressed(speech_like(args.seconds, 16000), 16000, "FLAC")),
+        ("OGG 48 kHz mono", compressed(speech_like(args.seconds, 48000), 48000, "OGG"))
+    ]
+    raw_pcm = (speech_like(args.seconds, 16000) * 32767).astype("<i2").tobytes()
+
+    try:
+        import librosa
+        has_librosa = True
+    except ImportError:
+        has_librosa = False
+        print("⚠️ librosa not installed, compressed formats and the librosa baseline are skipped")
+
+    print(f"⏱️ Decode cost for a {args.seconds:.0f}s clip (mean of {args.repeats} runs)")
+    print("=" * 72)
+    print(f"{'Format':<30}{'Fast path':>14}{'librosa':>14}{'Speedup':>12}")
+
+    for label, data in cases:
+        if data is None:
+            print(f"{label:<30}{'n/a (needs soundfile)':>40}")
+            continue
+
+        samples, decode_path = decode_audio(data)
+        if decode_path == "librosa" and not has_librosa:
+            continue
+        fast_ms = time_decode(decode_audio, data, args.repeats)
+        baseline_ms = time_decode(librosa_decode, data, args.repeats) if has_librosa else None
+
+        baseline = f"{baseline_ms:.2f}ms" if baseline_ms is not None else "-"
+        speedup = f"{baseline_ms / fast_ms:.1f}x" if baseline_ms is not None and decode_path == "wav" else "-"
+        print(f"{label:<30}{fast_ms:>12.2f}ms{baseline:>14}{speedup:>12}   [{decode_path}, {len(samples)} samples]")
+
+    pcm_ms = time_decode(lambda data: resample(pcm16_to_float32(data), 16000), raw_pcm, args.repeats)
+    print(f"{'Raw PCM 16 kHz (audio/pcm)':<30}{pcm_ms:>12.2f}ms")
+
+if __name__ == "__main__":
+    main()
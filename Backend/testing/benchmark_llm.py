@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.llm import HistoricalCharacterLLM, LLMOverloadedError
+from app.core.session_manager import ConversationSession
+
+QUESTIONS = [
+    ("roman_gladiator", "How did gladiators train for the arena?"),
+    ("mughal_architect", "How was the Taj Mahal designed?"),
+    ("egyptian_scribe", "What did a scribe write every day?"),
+    ("medieval_knight", "What does chivalry mean to you?"),
+    ("viking_explorer", "How did you navigate the open sea?"),
+    ("renaissance_master", "What inspired your flying machines?")
+]
+
+FACTS = [
+    {"text": "Training took place in a ludus under the supervision of a lanista.", "relevance_score": 0.82},
+    {"text": "Wooden practice swords were heavier than real weapons.", "relevance_score": 0.71},
+    {"text": "Gladiators ate a largely vegetarian diet of barley and beans.", "relevance_score": 0.55}
+]
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(label, values):
+    if not values:
+        print(f"   {label}: no samples")
+        return
+    print(f"   {label}: p50 {percentile(values, 50):.0f}ms | p95 {percentile(values, 95):.0f}ms | mean {statistics.mean(values):.0f}ms")
+
+async def run_session(llm, index, turns, stream, results):
+    character_id, question = QUESTIONS[index % len(QUESTIONS)]
+    session = ConversationSession(character_id)
+
+    for turn in range(turns):
+        query = question if turn == 0 else f"Tell me more about that, part {turn}."
+        start = time.time()
+        try:
+            if stream:
+                first_token_ms = None
+                final = {}
+                async for event in llm.stream_response(character_id, query, FACTS, session.get_recent_context(), session=session):
+                    if event["type"] == "token" and first_token_ms is None:
+                        first_token_ms = (time.time() - start) * 1000
+                    elif event["type"] == "done":
+                        final = event
+                response_text = final.get("response_text", "")
+                if first_token_ms is not None:
+                    results["first_token_ms"].append(first_token_ms)
+                if final.get("error"):
+                    results["errors"] += 1
+            else:
+                response = await llm.generate_response(character_id, query, FACTS, session.get_recent_context(), session=session)
+                response_text = response["response_text"]
+                served_by = response.get("served_by", "unknown")
+                results["served_by"][served_by] = results["served_by"].get(served_by, 0) + 1
+        except LLMOverloadedError as e:
+            results["overloaded"] += 1
+            print(f"   🚦 Session {index} turn {turn} rejected, retry after {e.retry_after}s")
+            continue
+
+        results["latency_ms"].append((time.time() - start) * 1000)
+        session.add_exchange(query, response_text)
+
+async def run_benchmark(args):
+    llm = HistoricalCharacterLLM(
+        model_name=args.model,
+        host=args.host,
+        max_concurrent_generations=args.max_concurrent,
+        tokenizer_name=args.tokenizer
+    )
+
+    results = {"latency_ms": [], "first_token_ms": [], "served_by": {}, "errors": 0, "overloaded": 0}
+
+    print(f"🏁 Benchmarking {args.sessions} sessions x {args.turns} turns against {args.host} ({'streaming' if args.stream else 'non-streaming'})")
+    start = time.time()
+    await asyncio.gather(*(run_session(llm, index, args.turns, args.stream, results) for index in range(args.sessions)))
+    elapsed = time.time() - start
+
+    completed = len(results["latency_ms"])
+    print(f"\n📊 Completed {completed} generations in {elapsed:.2f}s ({completed / elapsed:.2f}/s)")
+    summarize("Latency", results["latency_ms"])
+    if args.stream:
+        summarize("First token", results["first_token_ms"])
+    else:
+        print(f"   Served by: {results['served_by']}")
+    print(f"   Errors: {results['errors']} | Rejected (429): {results['overloaded']}")
+
+    info = llm.get_model_info()
+    reuse = info["prompt_reuse"]
+    print(f"   Prompt eval (full): {reuse['full']}")
+    print(f"   Prompt eval (reused context): {reuse['reused']}")
+    print(f"   Scheduler: {info['scheduler']}")
+
+    await llm.aclose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency benchmark for HistoricalCharacterLLM")
+    parser.add_argument("--host", default=os.getenv("OLLAMA_HOST", "http://127.0.0.1:12346"))
+    parser.add_argument("--model", default=os.getenv("OLLAMA_MODEL", "llama3.2:3b"))
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent conversations")
+    parser.add_argument("--turns", type=int, default=3, help="turns per conversation")
+    parser.add_argument("--max-concurrent", type=int, default=2, help="LLM scheduler slots per backend")
+    parser.add_argument("--tokenizer", default=None, help="Hugging Face tokenizer for prompt budgets (default: estimate)")
+    parser.add_argument("--stream", action="store_true", help="use stream_response instead of generate_response")
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.stt_engines import STT_ENGINES, create_stt_engine
+from app.utils.audio_processing import TARGET_SAMPLE_RATE, decode_audio
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare STT engines on the same audio file")
+    parser.add_argument("audio_file", help="speech recording (wav, mp3, ...)")
+    parser.add_argument("--engines", nargs="+", default=list(STT_ENGINES.keys()), choices=list(STT_ENGINES.keys()))
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads for faster-whisper (0 = library default)")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.audio_file, "rb") as f:
+        audio, _ = decode_audio(f.read())
+    duration = len(audio) / TARGET_SAMPLE_RATE
+
+    print(f"⏱️ STT engines on {args.audio_file} ({duration:.1f}s, model {args.model}, {args.device})")
+    print("=" * 72)
+
+    for name in args.engines:
+        engine = create_stt_engine(name, args.model, args.device, cpu_threads=args.threads)
+        try:
+            load_start = time.perf_counter()
+            engine.load()
+            load_s = time.perf_counter() - load_start
+        except RuntimeError as e:
+            print(f"⚠️ {name}: {e}")
+            continue
+
+        engine.warm_up()
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            result = engine.transcribe(audio, args.language)
+            timings.append(time.perf_counter() - start)
+
+        best = min(timings)
+        print(f"🎤 {name} ({engine.compute_type}): load {load_s:.1f}s, best {best:.2f}s, RTF {best / duration:.3f}")
+        print(f"   📝 [{result['language']}] {result['transcript']}")
+
+if __name__ == "__main__":
+    main()
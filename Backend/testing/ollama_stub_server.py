@@ -0,0 +1,232 @@
+"""Stand-in for the subset of the Ollama API used by HistoricalCharacterLLM.
+
+Serves /api/tags and /api/generate (plain and streaming NDJSON) with
+configurable time-to-first-token, prefill speed, tokens/sec, error rate and
+canned persona replies, so latency benchmarks don't depend on a live model.
+
+    python testing/ollama_stub_server.py --port 12346 --ttft-ms 250 --tokens-per-sec 25
+    OLLAMA_HOST=http://127.0.0.1:12346 python testing/benchmark_llm.py
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+CANNED_REPLIES = {
+    "Marcus Quintus": [
+        "By Jupiter, the sand of the Colosseum has tasted my sweat for twelve years. We trained at dawn with wooden swords twice the weight of steel, so the real blade felt like a feather.",
+        "The crowd's roar is like thunder over the Tiber, friend. Our lanista fed us barley and beans until we were strong as oxen, and every scar I carry tells a story."
+    ],
+    "Ustad Ahmad Lahauri": [
+        "The Taj Mahal rose from the banks of the Yamuna through the labor of twenty thousand hands. We aligned every minaret so that the tomb would stand eternal, even against the earth's trembling.",
+        "Symmetry is the language of paradise, my friend. In my workshop we cut marble so fine that light passes through it, and inlaid it with stones from across the empire."
+    ],
+    "Khaemwaset": [
+        "My reed pen has recorded the grain of Pharaoh's storehouses since I was a boy at the House of Life. Hieroglyphs are the words of the gods, and each one must be drawn with care.",
+        "Papyrus grows thick along the Nile, and from it we make scrolls that outlast the men who write them. I have copied the Book of the Dead more times than I can count."
+    ],
+    "Sir Gareth of Camelot": [
+        "I began as a kitchen boy in Camelot, yet by valor I earned my spurs at the Round Table. Chivalry asks that we defend the weak and keep our word above all things.",
+        "A knight's armor weighs as much as a child, good traveler, but faith makes it light. I have ridden in tournaments from Caerleon to Winchester."
+    ],
+    "Erik Thorsson": [
+        "Our longships cut through the grey sea like wolves through snow. I have sailed west past Iceland to lands the skalds barely dare to sing of.",
+        "By Odin's beard, a Norseman trusts the stars, the sun-stone and his crew. Winter is for feasting and telling sagas by the hearth fire."
+    ],
+    "Leonardo da Vinci": [
+        "I have spent many nights dissecting the flight of birds so that one day man might soar as they do. Every notebook I keep is written in mirror script, for my thoughts are my own.",
+        "Painting is poetry that is seen rather than felt, my friend. The smile of the Lady Lisa took me years, for I could never quite finish her."
+    ]
+}
+
+DEFAULT_REPLY = "Greetings, traveler. I have lived through remarkable times and would gladly share what I have seen."
+
+class StubSettings:
+    def __init__(
+        self,
+        models: List[str],
+        ttft_ms: float,
+        prefill_tokens_per_sec: float,
+        tokens_per_sec: float,
+        error_rate: float,
+        parallel: int,
+        seed: Optional[int],
+        replies: Dict[str, List[str]]
+    ):
+        self.models = models
+        self.ttft_ms = ttft_ms
+        self.prefill_tokens_per_sec = prefill_tokens_per_sec
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate = error_rate
+        self.parallel = parallel
+        self.random = random.Random(seed)
+        self.replies = replies
+
+def count_tokens(text: str) -> int:
+    return math.ceil(len(text) / 4)
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def create_app(settings: StubSettings) -> FastAPI:
+    app = FastAPI(title="Ollama Stub")
+    slots = asyncio.Semaphore(settings.parallel)
+    stats = {"requests": 0, "streamed": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0, "prompt_tokens": 0, "context_requests": 0}
+    reply_counters: Dict[str, int] = {}
+
+    def pick_reply(prompt: str) -> str:
+        persona = next((name for name in settings.replies if prompt.rstrip().endswith(f"{name}:")), None)
+        if persona is None:
+            persona = next((name for name in settings.replies if name in prompt), None)
+        if persona is None:
+            return DEFAULT_REPLY
+        index = reply_counters.get(persona, 0)
+        reply_counters[persona] = index + 1
+        replies = settings.replies[persona]
+        return replies[index % len(replies)]
+
+    def split_tokens(text: str, limit: Optional[int]) -> List[str]:
+        words = text.split(" ")
+        tokens = [word + " " for word in words[:-1]] + [words[-1]]
+        return tokens[:limit] if limit else tokens
+
+    @app.get("/")
+    @app.head("/")
+    async def root():
+        return PlainTextResponse("Ollama is running")
+
+    @app.get("/api/version")
+    async def version():
+        return {"version": "0.0.0-stub"}
+
+    @app.get("/api/tags")
+    async def tags():
+        return {
+            "models": [
+                {"name": model, "model": model, "modified_at": now_iso(), "size": 0, "digest": "stub"}
+                for model in settings.models
+            ]
+        }
+
+    @app.get("/stub/stats")
+    async def stub_stats():
+        return stats
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        model = body.get("model", "")
+        prompt = body.get("prompt", "")
+        context = body.get("context") or []
+        options = body.get("options") or {}
+        stream = body.get("stream", True)
+
+        stats["requests"] += 1
+        if model not in settings.models:
+            stats["errors"] += 1
+            return JSONResponse({"error": f"model '{model}' not found, try pulling it first"}, status_code=404)
+        if settings.error_rate and settings.random.random() < settings.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": "stub: injected failure"}, status_code=500)
+
+        prompt_tokens = count_tokens(prompt)
+        stats["prompt_tokens"] += prompt_tokens
+        if context:
+            stats["context_requests"] += 1
+
+        reply = pick_reply(prompt)
+        tokens = split_tokens(reply, options.get("num_predict"))
+        prefill_s = settings.ttft_ms / 1000 + prompt_tokens / settings.prefill_tokens_per_sec
+        token_interval_s = 1 / settings.tokens_per_sec
+
+        def final_part(total_s: float) -> Dict:
+            return {
+                "model": model,
+                "created_at": now_iso(),
+                "response": "" if stream else "".join(tokens),
+                "done": True,
+                "context": list(context) + list(range(prompt_tokens + len(tokens))),
+                "total_duration": int(total_s * 1e9),
+                "load_duration": 0,
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": int(prompt_tokens / settings.prefill_tokens_per_sec * 1e9),
+                "eval_count": len(tokens),
+                "eval_duration": int(len(tokens) * token_interval_s * 1e9)
+            }
+
+        async def run_stream():
+            async with slots:
+                stats["in_flight"] += 1
+                stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+                start = time.time()
+                try:
+                    await asyncio.sleep(prefill_s)
+                    for index, token in enumerate(tokens):
+                        if index:
+                            await asyncio.sleep(token_interval_s)
+                        yield json.dumps({"model": model, "created_at": now_iso(), "response": token, "done": False}) + "\n"
+                    yield json.dumps(final_part(time.time() - start)) + "\n"
+                finally:
+                    stats["in_flight"] -= 1
+
+        if stream:
+            stats["streamed"] += 1
+            return StreamingResponse(run_stream(), media_type="application/x-ndjson")
+
+        async with slots:
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            start = time.time()
+            try:
+                await asyncio.sleep(prefill_s + max(len(tokens) - 1, 0) * token_interval_s)
+                return final_part(time.time() - start)
+            finally:
+                stats["in_flight"] -= 1
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama stub server for latency benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=12346)
+    parser.add_argument("--model", action="append", dest="models", help="model name to advertise (repeatable)")
+    parser.add_argument("--ttft-ms", type=float, default=250, help="fixed delay before the first token")
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=400, help="prompt evaluation speed added to time-to-first-token")
+    parser.add_argument("--tokens-per-sec", type=float, default=25, help="generation speed after the first token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of generate requests answered with HTTP 500")
+    parser.add_argument("--parallel", type=int, default=1, help="generations served concurrently, like OLLAMA_NUM_PARALLEL")
+    parser.add_argument("--seed", type=int, default=42, help="seed for error injection")
+    parser.add_argument("--replies", help="JSON file mapping persona name to a list of canned replies")
+    args = parser.parse_args()
+
+    replies = CANNED_REPLIES
+    if args.replies:
+        with open(args.replies, "r", encoding="utf-8") as f:
+            replies = json.load(f)
+
+    settings = StubSettings(
+        models=args.models or ["llama3.2:3b"],
+        ttft_ms=args.ttft_ms,
+        prefill_tokens_per_sec=args.prefill_tokens_per_sec,
+        tokens_per_sec=args.tokens_per_sec,
+        error_rate=args.error_rate,
+        parallel=args.parallel,
+        seed=args.seed,
+        replies=replies
+    )
+
+    print(f"🧪 Ollama stub on http://{args.host}:{args.port} serving {settings.models}")
+    print(f"   TTFT {args.ttft_ms:.0f}ms + prefill at {args.prefill_tokens_per_sec:.0f} tok/s, {args.tokens_per_sec:.0f} tok/s, error rate {args.error_rate:.0%}, parallel {args.parallel}")
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
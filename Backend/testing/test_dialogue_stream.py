@@ -0,0 +1,109 @@
+import requests
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.llm import StreamingResponseCleaner
+
+def test_dialogue_stream():
+    base_url = "http://localhost:8000/api/v1/dialogue/stream"
+    
+    test_cases = [
+        ("roman_gladiator", "How did gladiators train for the arena?"),
+        ("medieval_knight", "Hello, who are you?"),
+        ("egyptian_scribe", "")
+    ]
+    
+    print("🌊 Testing Streaming Dialogue Endpoint")
+    print("=" * 60)
+    
+    for character_id, text in test_cases:
+        print(f"\n🎭 {character_id}: '{text}'")
+        
+        start = time.time()
+        first_token_at = None
+        tokens = []
+        audio_segments = []
+        
+        with requests.post(base_url, data={"character_id": character_id, "user_text": text}, stream=True) as response:
+            if response.status_code != 200:
+                print(f"   ❌ Failed: {response.status_code} {response.text}")
+                continue
+            
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: "):])
+                    
+                    if event == "token":
+                        if first_token_at is None:
+                            first_token_at = time.time() - start
+                        tokens.append(data["text"])
+                    elif event == "audio":
+                        audio_segments.append(data["audio_url"])
+                        print(f"   🔊 Segment {data['segment_index']} ready after {time.time() - start:.2f}s: {data['audio_url']}")
+                    elif event == "done":
+                        streamed_text = "".join(tokens)
+                        print(f"   ⚡ First token after {first_token_at:.2f}s")
+                        print(f"   📝 Response: {data['response_text'][:80]}...")
+                        print(f"   ⏱️ Timings: {data['timings']}")
+                        print(f"   🎵 Audio segments: {len(data['audio_segments'])}")
+                        if audio_segments == data["audio_segments"]:
+                            print("   ✅ Audio segments arrived in order")
+                        if streamed_text.replace(" ", "") == data["response_text"].replace(" ", ""):
+                            print("   ✅ Streamed tokens match final response")
+                        else:
+                            print("   ⚠️ Streamed tokens differ from final response")
+                    elif event == "error":
+                        print(f"   ❌ Stream error: {data['error']}")
+    
+    print(f"\n🎉 Streaming dialogue testing complete!")
+
+def test_streaming_cleaner_boundaries():
+    prefixes = ["Marcus Quintus responds:", "Marcus Quintus:", "Response as Marcus Quintus:", "I respond:", "Response:"]
+    
+    def clean(text):
+        for prefix in prefixes:
+            if text.startswith(prefix):
+                text = text[len(prefix):].strip()
+        return text
+    
+    samples = [
+        "I respond: hi there",
+        "Marcus Quintus: By Jupiter, the sand of the arena!",
+        "Response: I respond:   we trained at dawn.",
+        "  Salve, citizen! The crowd roars.  ",
+        "Response as Marcus Quintus:\nThe lanista fed us barley."
+    ]
+    
+    print("\n🧪 Testing StreamingResponseCleaner chunk boundaries")
+    rng = random.Random(7)
+    failures = 0
+    
+    for text in samples:
+        expected = clean(text.strip())
+        splits = [[text[:cut], text[cut:]] for cut in range(1, len(text))]
+        for _ in range(200):
+            cuts = sorted(rng.sample(range(1, len(text)), rng.randint(1, min(6, len(text) - 1))))
+            splits.append([text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])])
+        
+        for chunks in splits:
+            cleaner = StreamingResponseCleaner(clean, prefixes)
+            streamed = "".join(cleaner.feed(chunk) for chunk in chunks) + cleaner.flush()
+            if streamed != expected:
+                failures += 1
+                print(f"   ❌ {chunks!r} -> {streamed!r}, expected {expected!r}")
+                break
+    
+    if failures == 0:
+        print(f"   ✅ Streamed output matches the non-streaming cleanup for all {len(samples)} samples")
+
+if __name__ == "__main__":
+    test_streaming_cleaner_boundaries()
+    test_dialogue_stream()
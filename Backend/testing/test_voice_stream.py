@@ -0,0 +1,67 @@
+import asyncio
+import json
+import sys
+import time
+import wave
+
+import websockets
+
+async def test_voice_stream(wav_path: str, character_id: str = "roman_gladiator"):
+    with wave.open(wav_path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            print("❌ Expected a mono 16-bit PCM WAV file")
+            return
+        sample_rate = wav.getframerate()
+        pcm = wav.readframes(wav.getnframes())
+
+    url = f"ws://localhost:8000/api/v1/dialogue/ws?character_id={character_id}&sample_rate={sample_rate}"
+    chunk_bytes = sample_rate // 10 * 2
+
+    print("🎙️ Testing Voice Stream WebSocket")
+    print("=" * 60)
+
+    async with websockets.connect(url) as ws:
+        print(f"   📡 {json.loads(await ws.recv())}")
+
+        async def send_audio():
+            for offset in range(0, len(pcm), chunk_bytes):
+                await ws.send(pcm[offset:offset + chunk_bytes])
+                await asyncio.sleep(0.1)
+            await ws.send(json.dumps({"type": "end"}))
+            print(f"   📤 Finished sending {len(pcm) / 2 / sample_rate:.1f}s of audio")
+
+        sender = asyncio.create_task(send_audio())
+        start = time.time()
+        audio_end = None
+
+        async for raw in ws:
+            message = json.loads(raw)
+            elapsed = time.time() - start
+
+            if message["type"] == "partial":
+                print(f"   📝 [{elapsed:.2f}s] Partial: {message['transcript']}")
+            elif message["type"] == "vad":
+                print(f"   🔈 [{elapsed:.2f}s] VAD {message['state']}")
+            elif message["type"] == "final":
+                audio_end = elapsed
+                print(f"   ✅ [{elapsed:.2f}s] Final transcript: {message['transcript']}")
+            elif message["type"] == "token":
+                print(message["text"], end="", flush=True)
+            elif message["type"] == "audio":
+                print(f"\n   🔊 [{elapsed:.2f}s] Segment {message['segment_index']}: {message['audio_url']}")
+            elif message["type"] == "done":
+                print(f"\n   ⏱️ Timings: {message['timings']}")
+                if audio_end is not None:
+                    print(f"   ⚡ Reply finished {elapsed - audio_end:.2f}s after the final transcript")
+                break
+            elif message["type"] == "error":
+                print(f"   ❌ Error: {message}")
+                break
+
+        await sender
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python testing/test_voice_stream.py <mono_16bit.wav> [character_id]")
+        sys.exit(1)
+    asyncio.run(test_voice_stream(*sys.argv[1:3]))